@@ -0,0 +1,195 @@
+"""
+以離線的驗證碼語料量測 OCR 前處理流程的準確率與速度，不需要連線到 7-11。
+
+語料為一個資料夾，檔名開頭是正確答案，例如 4821.png、4821_1699999999.png
+(設定 CAPTCHA_CORPUS_DIR 後，TrackingBot 查詢成功時會自動存下這種檔案)。
+
+用法:
+    python Benchmark/BenchCaptcha.py --corpus ./captcha_corpus
+    python Benchmark/BenchCaptcha.py --corpus ./captcha_corpus --variants baseline no-bilateral
+    python Benchmark/BenchCaptcha.py --corpus ./captcha_corpus --sweep
+    python Benchmark/BenchCaptcha.py --synthetic 200   # 用替身伺服器的驗證碼產生語料
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+
+from StandInServer import captcha_png
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(repo_root, "TrackingBot"))
+
+# 目前線上使用的參數為 baseline，其他為常見的替代組合
+variants = {
+    "baseline": {},
+    "no-bilateral": {"bilateral": None},
+    "no-open": {"open_iterations": 0},
+    "fast": {"bilateral": None, "open_iterations": 0},
+    "bilateral-5": {"bilateral": (5, 50, 50)},
+    "block-15": {"block_size": 15, "threshold_c": 4},
+}
+
+# --sweep 的參數網格
+sweep_grid = {
+    "bilateral": [None, (5, 50, 50), (9, 75, 75)],
+    "block_size": [9, 11, 15],
+    "threshold_c": [2, 4, 6],
+    "kernel_size": [0, 2],
+}
+
+
+def load_corpus(folder, limit=None):
+    samples = []
+    for name in sorted(os.listdir(folder)):
+        stem, ext = os.path.splitext(name)
+        label = stem.split("_")[0]
+        if ext.lower() not in (".png", ".gif", ".jpg", ".jpeg", ".bmp") or not label.isdigit():
+            continue
+        with open(os.path.join(folder, name), "rb") as f:
+            samples.append((label, f.read()))
+    if limit:
+        samples = samples[:limit]
+    return samples
+
+
+def synthetic_corpus(count, length, seed):
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        label = "".join(rng.choice("0123456789") for _ in range(length))
+        samples.append((label, captcha_png(label)))
+    return samples
+
+
+def run_variant(name, options, samples, engine, length, min_confidence):
+    from CaptchaSolver import decode_image, preprocess
+
+    stage_totals = {"decode": 0.0, "preprocess": 0.0, "ocr": 0.0}
+    correct = accepted = accepted_correct = 0
+    start = time.perf_counter()
+    for label, data in samples:
+        t0 = time.perf_counter()
+        image = decode_image(data)
+        t1 = time.perf_counter()
+        processed = preprocess(image, **options)
+        t2 = time.perf_counter()
+        text, confidence = engine.recognize(processed)
+        t3 = time.perf_counter()
+
+        stage_totals["decode"] += t1 - t0
+        stage_totals["preprocess"] += t2 - t1
+        stage_totals["ocr"] += t3 - t2
+
+        # 與 CaptchaSolver 相同的過濾與信心度判斷
+        text = "".join(ch for ch in text if ch in engine.whitelist)
+        ok = len(text) == length and confidence >= min_confidence
+        correct += text == label
+        if ok:
+            accepted += 1
+            accepted_correct += text == label
+    elapsed = time.perf_counter() - start
+
+    count = len(samples)
+    return {
+        "name": name,
+        "accuracy": correct / count,
+        "accepted": accepted / count,
+        "precision": accepted_correct / accepted if accepted else 0.0,
+        "decode": stage_totals["decode"] / count * 1000,
+        "preprocess": stage_totals["preprocess"] / count * 1000,
+        "ocr": stage_totals["ocr"] / count * 1000,
+        "solves": count / elapsed if elapsed else 0.0,
+    }
+
+
+def sweep_variants():
+    keys = list(sweep_grid)
+    for values in itertools.product(*(sweep_grid[key] for key in keys)):
+        options = dict(zip(keys, values))
+        bilateral = options["bilateral"][0] if options["bilateral"] else 0
+        name = (
+            f"b{bilateral}-blk{options['block_size']}"
+            f"-c{options['threshold_c']}-k{options['kernel_size']}"
+        )
+        yield name, options
+
+
+def print_report(results, tolerance):
+    print()
+    print(
+        f"{'變體':<22}{'準確率':>8}{'接受率':>8}{'接受準確':>9}"
+        f"{'解碼ms':>9}{'前處理ms':>10}{'OCRms':>9}{'solves/s':>10}"
+    )
+    for r in results:
+        print(
+            f"{r['name']:<22}{r['accuracy']:>8.1%}{r['accepted']:>8.1%}"
+            f"{r['precision']:>9.1%}{r['decode']:>9.2f}{r['preprocess']:>10.2f}"
+            f"{r['ocr']:>9.2f}{r['solves']:>10.1f}"
+        )
+
+    # 在準確率不低於最佳值 - tolerance 的變體中，選出最快的
+    best_accuracy = max(r["accuracy"] for r in results)
+    candidates = [r for r in results if r["accuracy"] >= best_accuracy - tolerance]
+    fastest = max(candidates, key=lambda r: r["solves"])
+    print(
+        f"\n建議: {fastest['name']} (準確率 {fastest['accuracy']:.1%}，"
+        f"{fastest['solves']:.1f} solves/s；容許準確率差距 {tolerance:.0%})"
+    )
+    print("接受率 / 接受準確 為通過長度與信心度檢查的比例，以及其中真正正確的比例。")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="驗證碼 OCR 前處理基準測試")
+    parser.add_argument("--corpus", help="標註好的驗證碼圖片資料夾")
+    parser.add_argument("--synthetic", type=int, default=0, help="改用 N 張替身伺服器產生的驗證碼")
+    parser.add_argument("--limit", type=int, help="最多使用幾張語料")
+    parser.add_argument(
+        "--variants", nargs="+", choices=sorted(variants), default=sorted(variants)
+    )
+    parser.add_argument("--sweep", action="store_true", help="改為掃描整個參數網格")
+    parser.add_argument("--length", type=int, default=4, help="驗證碼長度")
+    parser.add_argument("--min-confidence", type=float, default=60)
+    parser.add_argument("--tolerance", type=float, default=0.01, help="挑選建議變體時容許的準確率差距")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.corpus:
+        samples = load_corpus(args.corpus, args.limit)
+    elif args.synthetic:
+        samples = synthetic_corpus(args.synthetic, args.length, args.seed)
+    else:
+        sys.exit("請指定 --corpus 資料夾或 --synthetic 數量")
+    if not samples:
+        sys.exit("語料是空的")
+
+    from CaptchaSolver import OcrEngine
+
+    engine = OcrEngine()
+    print(f"語料 {len(samples)} 張，OCR 引擎: {engine.backend}")
+
+    if args.sweep:
+        cases = list(sweep_variants())
+    else:
+        cases = [(name, variants[name]) for name in args.variants]
+
+    # 先跑一張暖機，避免第一次載入模型的時間算進第一個變體
+    run_variant("warmup", {}, samples[:1], engine, args.length, args.min_confidence)
+
+    results = []
+    for index, (name, options) in enumerate(cases, 1):
+        print(f"[{index}/{len(cases)}] {name}")
+        results.append(
+            run_variant(name, options, samples, engine, args.length, args.min_confidence)
+        )
+    print_report(results, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""
+以本地替身伺服器量測各下載器的吞吐量，結果可重現、不受線上 CDN 影響。
+
+用法:
+    python Benchmark/BenchDownloaders.py --workers 10 25 50 --count 500
+    python Benchmark/BenchDownloaders.py --targets monster --latency 0.1 --error-ratio 0.05
+"""
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import threading
+import contextlib
+
+import aiohttp
+import requests
+
+from StandInServer import StandInServer, ServerConfig
+
+repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("Monster", "StarRail", "Scrap"):
+    sys.path.insert(0, os.path.join(repo_root, folder))
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ClientTimings:
+    """用戶端量測的請求延遲 (秒)，可在多個執行緒中記錄。"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = []
+
+    def record(self, latency):
+        with self.lock:
+            self.latencies.append(latency)
+
+
+class TimedSession:
+    """
+    包裝 aiohttp.ClientSession：每個請求從送出 (含等待連線) 到離開 async with
+    (內容已讀完並寫入 .part) 的時間記入 timings。
+    """
+
+    def __init__(self, session, timings):
+        self._session = session
+        self._timings = timings
+
+    def get(self, url, **kwargs):
+        return self._timed(self._session.get(url, **kwargs))
+
+    def head(self, url, **kwargs):
+        return self._timed(self._session.head(url, **kwargs))
+
+    @contextlib.asynccontextmanager
+    async def _timed(self, request):
+        start = time.monotonic()
+        try:
+            async with request as response:
+                yield response
+        finally:
+            self._timings.record(time.monotonic() - start)
+
+
+@contextlib.contextmanager
+def timed_requests(timings):
+    """
+    暫時包裝 requests.Session.send，量測 requests 型下載器每個請求的延遲
+    (stream=True 的請求只量到收到回應標頭為止)。
+    """
+    original = requests.Session.send
+
+    def send(session, request, **kwargs):
+        start = time.monotonic()
+        try:
+            return original(session, request, **kwargs)
+        finally:
+            timings.record(time.monotonic() - start)
+
+    requests.Session.send = send
+    try:
+        yield
+    finally:
+        requests.Session.send = original
+
+
+def run_monster(server, workers, count, adaptive, timings):
+    import ScrapingDict
+    from SyncManifest import SyncManifest
+
+    ScrapingDict.asset_base_url = f"{server.base_url}/monster"
+    ScrapingDict.char_folder = os.path.abspath("char")
+    ScrapingDict.ball_folder = os.path.abspath("ball")
+    os.makedirs(ScrapingDict.char_folder, exist_ok=True)
+    os.makedirs(ScrapingDict.ball_folder, exist_ok=True)
+
+    async def sweep():
+        if adaptive:
+            limiter = ScrapingDict.AdaptiveLimiter(
+                workers, ScrapingDict.min_concurrency, ScrapingDict.max_concurrency
+            )
+        else:
+            limiter = ScrapingDict.AdaptiveLimiter(workers, workers, workers)
+        manifest = SyncManifest(os.path.abspath("manifest.db"))
+        connector = aiohttp.TCPConnector(limit=ScrapingDict.max_concurrency)
+        timeout = aiohttp.ClientTimeout(total=10)
+        async with aiohttp.ClientSession(
+            connector=connector, timeout=timeout
+        ) as session:
+            ctx = ScrapingDict.SweepContext(
+                TimedSession(session, timings), limiter, manifest
+            )
+            queue = asyncio.Queue()
+            for number in range(1, count + 1):
+                queue.put_nowait(number)
+
+            async def worker():
+                while not queue.empty():
+                    number = queue.get_nowait()
+                    await ScrapingDict.download_images_for_number(ctx, number)
+
+            # AIMD 模式要留足夠的 worker，讓並行數有空間往上調
+            if adaptive:
+                worker_count = ScrapingDict.max_concurrency // 2
+            else:
+                worker_count = max(1, workers)
+            await asyncio.gather(*(worker() for _ in range(worker_count)))
+        manifest.close()
+        return limiter
+
+    limiter = asyncio.run(sweep())
+    return f"最終並行數 {limiter.limit}" if adaptive else ""
+
+
+def run_starrail(server, workers, count, adaptive, timings):
+    import ScrapStarRail
+
+    image_list = [(f"/img/{i}.png", i) for i in range(count)]
+    ScrapStarRail.download_images(
+        image_list, os.path.abspath("starrail"), server.base_url, max_workers=workers
+    )
+    return ""
+
+
+def run_scrap_website(server, workers, count, adaptive, timings):
+    import ScrapWebsite
+
+    server.httpd.config.page_images = count
+    ScrapWebsite.download_images(f"{server.base_url}/page.html")
+    return "單執行緒"
+
+
+targets = {
+    "monster": run_monster,
+    "starrail": run_starrail,
+    "website": run_scrap_website,
+}
+
+
+def run_case(server, name, workers, count, adaptive):
+    runner = targets[name]
+    server.reset()
+    timings = ClientTimings()
+    # 每次都在新的暫存資料夾執行，避免「已存在就跳過」影響量測
+    with tempfile.TemporaryDirectory() as work_dir:
+        previous_dir = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            with timed_requests(timings):
+                start = time.monotonic()
+                note = runner(server, workers, count, adaptive, timings)
+                elapsed = time.monotonic() - start
+        finally:
+            os.chdir(previous_dir)
+
+    stats = server.stats
+    with stats.lock:
+        request_count = stats.requests
+        bytes_sent = stats.bytes_sent
+    with timings.lock:
+        latencies = list(timings.latencies)
+    return {
+        "target": name,
+        "workers": "AIMD" if adaptive else workers,
+        "elapsed": elapsed,
+        "rps": request_count / elapsed if elapsed else 0.0,
+        "mbps": bytes_sent / elapsed / 1024 / 1024 if elapsed else 0.0,
+        "p50": percentile(latencies, 0.50) * 1000,
+        "p99": percentile(latencies, 0.99) * 1000,
+        "note": note,
+    }
+
+
+def print_report(results):
+    print()
+    print(
+        f"{'目標':<10}{'並行數':>8}{'耗時(s)':>10}{'req/s':>10}"
+        f"{'MB/s':>9}{'p50(ms)':>10}{'p99(ms)':>10}  備註"
+    )
+    for r in results:
+        print(
+            f"{r['target']:<10}{str(r['workers']):>8}{r['elapsed']:>10.2f}"
+            f"{r['rps']:>10.1f}{r['mbps']:>9.2f}{r['p50']:>10.1f}{r['p99']:>10.1f}"
+            f"  {r['note']}"
+        )
+    print(
+        "延遲為用戶端量測：monster 從送出請求 (含等待連線) 到內容寫完；"
+        "starrail 為收到回應標頭為止；website 含下載內容。"
+    )
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="下載器吞吐量基準測試")
+    parser.add_argument(
+        "--targets", nargs="+", choices=sorted(targets), default=sorted(targets)
+    )
+    parser.add_argument("--workers", nargs="+", type=int, default=[5, 10, 25, 50])
+    parser.add_argument("--count", type=int, default=300, help="每次執行的編號 / 圖片數")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.02)
+    parser.add_argument("--size-mean", type=int, default=80 * 1024)
+    parser.add_argument("--size-sigma", type=float, default=0.5)
+    parser.add_argument("--not-found-ratio", type=float, default=0.3)
+    parser.add_argument("--error-ratio", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    config = ServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        size_mean=args.size_mean,
+        size_sigma=args.size_sigma,
+        not_found_ratio=args.not_found_ratio,
+        error_ratio=args.error_ratio,
+        seed=args.seed,
+    )
+    server = StandInServer(config).start()
+    print(f"替身伺服器: {server.base_url}")
+
+    results = []
+    try:
+        for name in args.targets:
+            if name == "website":
+                # ScrapWebsite 是逐張下載，並行數不適用
+                results.append(run_case(server, name, 1, args.count, False))
+                continue
+            for workers in args.workers:
+                results.append(run_case(server, name, workers, args.count, False))
+            if name == "monster":
+                results.append(
+                    run_case(server, name, min(args.workers), args.count, True)
+                )
+    finally:
+        server.stop()
+
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import time
+import zlib
+import html
+import struct
+import random
+import secrets
+import hashlib
+import threading
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# 假圖片的檔頭，讓依 Content-Type / magic bytes 判斷的程式照常運作
+webp_header = b"RIFF\x00\x00\x00\x00WEBPVP8 "
+png_header = b"\x89PNG\r\n\x1a\n"
+
+
+class ServerConfig:
+    """
+    本地替身伺服器的行為設定。
+    latency / jitter 單位為秒；size_mean 為 bytes (對數常態分布)；
+    not_found_ratio 以路徑決定，同一路徑每次結果相同；
+    error_ratio 為暫時性錯誤 (503)，每個請求各自以固定種子抽籤，重試可能成功且每次執行可重現。
+    """
+
+    def __init__(
+        self,
+        latency=0.05,
+        jitter=0.02,
+        size_mean=80 * 1024,
+        size_sigma=0.5,
+        not_found_ratio=0.3,
+        error_ratio=0.0,
+        page_images=200,
+        captcha_length=4,
+        seed=0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.size_mean = size_mean
+        self.size_sigma = size_sigma
+        self.not_found_ratio = not_found_ratio
+        self.error_ratio = error_ratio
+        self.page_images = page_images
+        self.captcha_length = captcha_length
+        self.seed = seed
+
+
+class ServerStats:
+    """伺服器端統計：請求數、傳送位元組與每個請求的處理時間 (含注入的延遲)。"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.latencies = []
+            self.statuses = {}
+
+    def record(self, status, size, latency):
+        with self.lock:
+            self.requests += 1
+            self.bytes_sent += size
+            self.latencies.append(latency)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+
+def path_random(config, path):
+    # 以路徑為種子，讓 404 / 錯誤 / 大小在不同次執行間可重現
+    digest = hashlib.sha256(f"{config.seed}:{path}".encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def make_payload(rng, config, path):
+    size = max(64, int(rng.lognormvariate(0, config.size_sigma) * config.size_mean))
+    header = png_header if path.endswith(".png") else webp_header
+    body = bytearray(header)
+    block = hashlib.sha256(path.encode()).digest()
+    while len(body) < size:
+        body.extend(block)
+    return bytes(body[:size])
+
+
+# 3x5 點陣數字，用來畫替身查詢頁的驗證碼圖片 (不依賴 Pillow)
+digit_font = {
+    "0": ("111", "101", "101", "101", "111"),
+    "1": ("010", "110", "010", "010", "111"),
+    "2": ("111", "001", "111", "100", "111"),
+    "3": ("111", "001", "111", "001", "111"),
+    "4": ("101", "101", "111", "001", "001"),
+    "5": ("111", "100", "111", "001", "111"),
+    "6": ("111", "100", "111", "101", "111"),
+    "7": ("111", "001", "001", "001", "001"),
+    "8": ("111", "101", "111", "101", "111"),
+    "9": ("111", "101", "111", "001", "111"),
+}
+
+# 替身查詢頁依單號回傳的貨態
+tracking_statuses = ("包裹已寄件", "包裹配送中", "包裹已送達門市", "已完成取件")
+
+
+def captcha_png(code, scale=6, margin=4):
+    """把數字畫成白底黑字的灰階 PNG。"""
+    width = margin * 2 + len(code) * 4 * scale - scale
+    height = margin * 2 + 5 * scale
+    rows = []
+    for y in range(height):
+        row = bytearray(b"\xff" * width)
+        font_y = (y - margin) // scale
+        if 0 <= y - margin and font_y < 5:
+            for index, digit in enumerate(code):
+                bits = digit_font[digit][font_y]
+                for font_x, bit in enumerate(bits):
+                    if bit == "1":
+                        x = margin + (index * 4 + font_x) * scale
+                        row[x : x + scale] = b"\x00" * scale
+        rows.append(b"\x00" + bytes(row))
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)
+    return (
+        png_header
+        + chunk(b"IHDR", header)
+        + chunk(b"IDAT", zlib.compress(b"".join(rows)))
+        + chunk(b"IEND", b"")
+    )
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # 支援 keep-alive
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def do_POST(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        start = time.monotonic()
+        config = self.server.config
+        path = self.path.split("?")[0]
+        if path.startswith("/e-tracking/"):
+            status, headers, body = self.tracking_response(config, path)
+        else:
+            status, headers, body = self.build_response(config, path)
+
+        delay = config.latency + random.uniform(-config.jitter, config.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+        sent = len(body) if send_body else 0
+        self.server.stats.record(status, sent, time.monotonic() - start)
+
+    def build_response(self, config, path):
+        if path == "/page.html":
+            return 200, {"Content-Type": "text/html; charset=utf-8"}, self.page()
+
+        if self.transient_error(config):
+            return 503, {}, b""
+        rng = path_random(config, path)
+        if rng.random() < config.not_found_ratio:
+            return 404, {}, b""
+
+        body = make_payload(rng, config, path)
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        content_type = "image/png" if path.endswith(".png") else "image/webp"
+        return 200, {"Content-Type": content_type, "ETag": etag}, body
+
+    def transient_error(self, config):
+        if not config.error_ratio:
+            return False
+        with self.server.error_lock:
+            return self.server.error_rng.random() < config.error_ratio
+
+    def page(self):
+        # 給 ScrapWebsite / StarRail 使用的圖片清單頁面
+        tags = "".join(
+            f'<img class="avatar" src="/img/{i}.png">'
+            for i in range(self.server.config.page_images)
+        )
+        return f"<html><body>{tags}</body></html>".encode("utf-8")
+
+
+    # --- 模仿 7-11 e-tracking 的 ASP.NET 查詢表單 ---
+
+    def tracking_session(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        sessions = self.server.tracking_sessions
+        session_id = cookie["ASP.NET_SessionId"].value if "ASP.NET_SessionId" in cookie else None
+        with self.server.tracking_lock:
+            if session_id not in sessions:
+                session_id = secrets.token_hex(12)
+                sessions[session_id] = {"viewstate": None, "code": None}
+            return session_id, sessions[session_id]
+
+    def tracking_response(self, config, path):
+        session_id, session = self.tracking_session()
+        headers = {"Set-Cookie": f"ASP.NET_SessionId={session_id}; path=/; HttpOnly"}
+
+        if path == "/e-tracking/ValidateImage.aspx":
+            # 每次下載都換一組新的驗證碼
+            session["code"] = "".join(
+                random.choice("0123456789") for _ in range(config.captcha_length)
+            )
+            headers["Content-Type"] = "image/png"
+            headers["Cache-Control"] = "no-cache"
+            return 200, headers, captcha_png(session["code"])
+
+        if path != "/e-tracking/search.aspx":
+            return 404, headers, b""
+
+        headers["Content-Type"] = "text/html; charset=utf-8"
+        if self.command != "POST":
+            return 200, headers, self.tracking_page(session)
+
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        field = lambda name: form.get(name, [""])[0]
+        if field("__VIEWSTATE") != session["viewstate"] or field("tbChkCode") != session["code"]:
+            return 200, headers, self.tracking_page(session, error="驗證碼錯誤")
+
+        session["code"] = None  # 驗證碼只能使用一次
+        number = field("txtProductNum")
+        if not number.isdigit():
+            return 200, headers, self.tracking_page(session, error="查無此單號資料")
+        status = path_random(config, number).choice(tracking_statuses)
+        return 200, headers, self.tracking_page(session, number=number, status=status)
+
+    def tracking_page(self, session, error=None, number=None, status=None):
+        session["viewstate"] = secrets.token_urlsafe(32)
+        parts = [
+            '<html><body><form method="post" action="./search.aspx" id="form1">',
+            f'<input type="hidden" name="__VIEWSTATE" id="__VIEWSTATE" value="{session["viewstate"]}">',
+            '<input type="hidden" name="__VIEWSTATEGENERATOR" value="0A1B2C3D">',
+            '<input name="txtProductNum" type="text" id="txtProductNum">',
+            f'<img id="ImgVCode" src="ValidateImage.aspx?ts={time.time_ns()}">',
+            '<input name="tbChkCode" type="text" id="tbChkCode">',
+            '<input type="submit" name="btnSearch" value="查詢" id="btnSearch">',
+            "</form>",
+        ]
+        if error:
+            parts.append(f'<span id="lbMsg">{html.escape(error)}</span>')
+        if status:
+            parts.append(f'<div id="query_no">{html.escape(number)}</div>')
+            parts.append(f'<div id="timeline_status">{html.escape(status)}</div>')
+        parts.append("</body></html>")
+        return "".join(parts).encode("utf-8")
+
+
+class StandInServer:
+    """在背景執行緒啟動的本地 HTTP 伺服器。"""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), StandInHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = config or ServerConfig()
+        self.httpd.stats = ServerStats()
+        self.httpd.tracking_sessions = {}
+        self.httpd.tracking_lock = threading.Lock()
+        self.httpd.error_lock = threading.Lock()
+        self.httpd.error_rng = random.Random(self.httpd.config.seed)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def stats(self):
+        return self.httpd.stats
+
+    def reset(self):
+        """清除統計並重設錯誤注入的亂數，讓每個量測案例看到相同的錯誤序列。"""
+        self.httpd.stats.reset()
+        with self.httpd.error_lock:
+            self.httpd.error_rng.seed(self.httpd.config.seed)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    server = StandInServer(port=8000).start()
+    print(f"替身伺服器啟動: {server.base_url} (Ctrl+C 結束)")
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
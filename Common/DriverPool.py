@@ -0,0 +1,193 @@
+import atexit
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+
+try:
+    import psutil
+except ImportError:  # 沒安裝 psutil 時不檢查記憶體，只依使用次數回收
+    psutil = None
+
+
+def build_chrome_options(headless=True):
+    """TrackingBot、StarRail、Scrap 共用的 Chrome 設定。"""
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--ignore-certificate-errors")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--disable-browser-side-navigation")
+    chrome_options.add_argument("--disable-infobars")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    return chrome_options
+
+
+class PooledDriver:
+    """記錄 WebDriver 的使用次數，用來決定何時回收。"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.uses = 0
+
+
+class DriverPool:
+    """
+    預先啟動的 headless Chrome 池：
+    借出前做健康檢查、歸還時清除狀態，使用 max_uses 次或記憶體超過上限就重開。
+    """
+
+    def __init__(self, size=2, max_uses=50, max_memory_mb=1024, headless=True, prelaunch=True):
+        self.size = size
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.headless = headless
+        self._idle = queue.LifoQueue()  # 優先借出最近用過 (最熱) 的瀏覽器
+        self._lock = threading.Lock()
+        self._launched = 0
+        self._closed = False
+        if prelaunch:
+            for _ in range(size):
+                with self._lock:
+                    self._launched += 1
+                self._idle.put(self._launch())
+
+    def _launch(self):
+        """啟動新的瀏覽器，呼叫前必須已在鎖內預留名額 (_launched += 1)，失敗時歸還。"""
+        try:
+            driver = webdriver.Chrome(options=build_chrome_options(self.headless))
+        except Exception:
+            with self._lock:
+                self._launched -= 1
+            raise
+        return PooledDriver(driver)
+
+    def _discard(self, pooled):
+        with self._lock:
+            self._launched -= 1
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def _is_healthy(self, pooled):
+        try:
+            return pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _memory_mb(self, pooled):
+        if psutil is None:
+            return 0
+        try:
+            process = psutil.Process(pooled.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+            return sum(p.memory_info().rss for p in processes) / 1024 / 1024
+        except Exception:
+            return 0
+
+    def _reset(self, pooled):
+        """清除 cookie、storage 與快取，回到空白頁，讓下一位使用者拿到乾淨的狀態。"""
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        try:
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        except Exception:
+            pass  # about:blank 等頁面沒有 storage
+        try:
+            driver.execute_cdp_cmd("Network.clearBrowserCache", {})
+        except Exception:
+            pass
+        driver.get("about:blank")
+
+    def acquire(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                # 檢查與預留名額在同一次加鎖內完成，避免多個執行緒同時通過檢查而超過 size
+                with self._lock:
+                    can_launch = self._launched < self.size
+                    if can_launch:
+                        self._launched += 1
+                if can_launch:
+                    return self._launch()
+                # 短暫等待後重新檢查：其他執行緒回收瀏覽器時會空出啟動名額
+                wait = 1.0
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        raise TimeoutError("等待 WebDriver 逾時")
+                try:
+                    pooled = self._idle.get(timeout=wait)
+                except queue.Empty:
+                    continue
+
+            if self._is_healthy(pooled):
+                return pooled
+            print("WebDriver 健康檢查失敗，重新啟動")
+            self._discard(pooled)
+
+    def release(self, pooled, broken=False):
+        pooled.uses += 1
+        if self._closed or broken:
+            self._discard(pooled)
+            return
+        if pooled.uses >= self.max_uses or self._memory_mb(pooled) > self.max_memory_mb:
+            # 回收老化的瀏覽器，下一次 acquire 會啟動新的實例
+            self._discard(pooled)
+            return
+        try:
+            self._reset(pooled)
+        except Exception:
+            self._discard(pooled)
+            return
+        self._idle.put(pooled)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """with pool.driver() as driver: ... 借出一個 WebDriver，結束後自動歸還。"""
+        pooled = self.acquire(timeout)
+        broken = False
+        try:
+            yield pooled.driver
+        except Exception:
+            # 發生例外時瀏覽器狀態不可信，直接丟棄
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool(size=1):
+    """同一個行程內共用的預設池，第一次呼叫時才啟動瀏覽器。"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool(size=size)
+            # 行程結束時關閉瀏覽器，避免留下孤兒 Chrome
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -0,0 +1,117 @@
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+# 在頁面中安裝 MutationObserver，記錄 DOM 變動次數
+DOM_OBSERVER_SCRIPT = """
+if (!window.__pageReadyObserver) {
+    window.__pageReadyMutations = 0;
+    window.__pageReadyObserver = new MutationObserver(function (records) {
+        window.__pageReadyMutations += records.length;
+    });
+    window.__pageReadyObserver.observe(document, {
+        childList: true, subtree: true, attributes: true, characterData: true
+    });
+}
+return window.__pageReadyMutations;
+"""
+
+# 圖片總數與已載入數量 (complete 且有實際尺寸)
+IMAGE_COUNT_SCRIPT = """
+var images = document.images, loaded = 0;
+for (var i = 0; i < images.length; i++) {
+    if (images[i].complete && images[i].naturalWidth > 0) loaded++;
+}
+return [images.length, loaded];
+"""
+
+# 已完成的資源請求數，一段時間內不再增加即視為網路閒置。
+# performance.getEntriesByType 的緩衝預設只有 250 筆，滿了之後數量就不再增加，
+# 所以放大緩衝並改用 PerformanceObserver 計數 (不受緩衝上限影響)
+RESOURCE_COUNT_SCRIPT = """
+if (!window.__pageReadyResources) {
+    window.__pageReadyResources = {count: 0, observed: false};
+    try { performance.setResourceTimingBufferSize(100000); } catch (e) {}
+    try {
+        new PerformanceObserver(function (list) {
+            window.__pageReadyResources.count += list.getEntries().length;
+        }).observe({type: "resource", buffered: true});
+        window.__pageReadyResources.observed = true;
+    } catch (e) {}
+}
+if (window.__pageReadyResources.observed) return window.__pageReadyResources.count;
+return performance.getEntriesByType("resource").length;
+"""
+
+
+def document_ready(driver):
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def wait_for_stable(driver, probe, quiet=0.5, timeout=10, poll=0.1):
+    """
+    反覆呼叫 probe(driver)，回傳值連續 quiet 秒沒有改變就視為穩定。
+    在 timeout 內穩定回傳 True，逾時回傳 False。
+    """
+    deadline = time.monotonic() + timeout
+    last_value = None
+    changed_at = None
+    while True:
+        try:
+            value = probe(driver)
+        except WebDriverException:
+            value = None  # 頁面切換中，script 可能暫時無法執行
+        now = time.monotonic()
+        if changed_at is None or value != last_value:
+            last_value = value
+            changed_at = now
+        elif now - changed_at >= quiet:
+            return True
+        if now >= deadline:
+            return False
+        time.sleep(poll)
+
+
+def wait_for_page(
+    driver,
+    element=None,
+    images=False,
+    network_idle=False,
+    dom_quiet=False,
+    quiet=0.5,
+    timeout=15,
+):
+    """
+    等待頁面就緒，取代固定秒數的 sleep：
+    document.readyState 為 complete，且 element (例如 (By.ID, "ImgVCode")) 已出現，
+    再等圖片數量、資源請求數、DOM 變動次數中有開啟的訊號都靜止 quiet 秒。
+    timeout 為整體上限；回傳是否在時限內就緒，逾時不拋出例外，由呼叫端決定如何處理。
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        WebDriverWait(driver, timeout).until(document_ready)
+        if element is not None:
+            remaining = max(deadline - time.monotonic(), 0.1)
+            WebDriverWait(driver, remaining).until(EC.presence_of_element_located(element))
+    except TimeoutException:
+        return False
+
+    probes = []
+    if images:
+        probes.append(lambda d: tuple(d.execute_script(IMAGE_COUNT_SCRIPT)))
+    if network_idle:
+        probes.append(lambda d: d.execute_script(RESOURCE_COUNT_SCRIPT))
+    if dom_quiet:
+        probes.append(lambda d: d.execute_script(DOM_OBSERVER_SCRIPT))
+    if not probes:
+        return True
+
+    remaining = max(deadline - time.monotonic(), 0)
+    return wait_for_stable(
+        driver,
+        lambda d: tuple(probe(d) for probe in probes),
+        quiet=quiet,
+        timeout=remaining,
+    )
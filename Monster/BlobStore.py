@@ -0,0 +1,67 @@
+import os
+import shutil
+
+# 來源都是 WebP，blob 依內容格式命名，不沿用各編號檔案的副檔名
+default_extension = ".webp"
+
+
+class BlobStore:
+    """
+    以 sha256 為鍵的內容定址儲存區：相同內容只存一份，
+    各編號的檔案以硬連結 (不支援時改為複製) 指向同一個 blob。
+    """
+
+    def __init__(self, root, extension=default_extension):
+        self.root = root
+        self.extension = extension
+        self.linked = 0
+        self.deduped = 0
+        self._can_link = True
+        os.makedirs(root, exist_ok=True)
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}{self.extension}")
+
+    def commit(self, part_path, digest, file_path):
+        """
+        把下載完成的 .part 收進儲存區，並讓 file_path 指向對應的 blob。
+        內容已存在時直接丟棄 .part。
+        """
+        blob_path = self.blob_path(digest)
+        if os.path.exists(blob_path):
+            os.remove(part_path)
+            self.deduped += 1
+        else:
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.replace(part_path, blob_path)
+        self.link(blob_path, file_path)
+
+    def link(self, blob_path, file_path):
+        # 先建立暫存連結再改名，替換既有檔案時不會出現空窗
+        temp_path = f"{file_path}.link"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        if self._can_link:
+            try:
+                os.link(blob_path, temp_path)
+            except OSError:
+                print("檔案系統不支援硬連結，改為複製檔案")
+                self._can_link = False
+        if not self._can_link:
+            shutil.copyfile(blob_path, temp_path)
+        os.replace(temp_path, file_path)
+        self.linked += 1
+
+    def collect_garbage(self, live_digests):
+        """刪除已沒有任何編號參照的 blob，回傳刪除數量。"""
+        removed = 0
+        for prefix in os.listdir(self.root):
+            prefix_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for name in os.listdir(prefix_dir):
+                digest = name[: -len(self.extension)]
+                if digest not in live_digests:
+                    os.remove(os.path.join(prefix_dir, name))
+                    removed += 1
+        return removed
@@ -1,13 +1,18 @@
 import discord
 import os
-import requests
 import cv2
 import numpy as np
 import io
-from PIL import Image
+import time
+import asyncio
+import aiohttp
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-import random
 import json
+from ImageCache import ImageCache, image_url
+from GameState import GameStateStore
+from ImageAtlas import ImageAtlas
 
 # Load Discord Bot Token
 load_dotenv()
@@ -17,40 +22,93 @@ TOKEN = os.getenv("DISCORD_TOKEN")
 with open("monster.json", "r") as file:
     character_names_mapping = json.load(file)
 
+# Two-tier image cache: decoded arrays in memory, raw WebP on disk
+IMAGE_CACHE_BYTES = int(os.getenv("IMAGE_CACHE_BYTES", 256 * 1024 * 1024))
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "image_cache")
+IMAGE_CACHE_TTL = int(os.getenv("IMAGE_CACHE_TTL", 7 * 24 * 3600))
+image_cache = ImageCache(IMAGE_CACHE_BYTES, IMAGE_CACHE_DIR, IMAGE_CACHE_TTL)
+
+# Image source: "cdn" (default) or "atlas" to read pre-decoded pixels from a
+# memory-mapped atlas built by ImageAtlas.py; numbers missing from the atlas
+# still fall back to the cache / CDN
+IMAGE_SOURCE = os.getenv("IMAGE_SOURCE", "cdn").lower()
+IMAGE_ATLAS_PATH = os.getenv("IMAGE_ATLAS_PATH", "monster_atlas.bin")
+image_atlas = ImageAtlas(IMAGE_ATLAS_PATH) if IMAGE_SOURCE == "atlas" else None
+
+# Worker pool for decode / mosaic / encode so the event loop never blocks.
+# At most RENDER_QUEUE_LIMIT jobs may be queued or running; further requests wait
+# up to RENDER_QUEUE_TIMEOUT seconds for a slot and are then told to retry.
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", os.cpu_count() or 2))
+RENDER_QUEUE_LIMIT = int(os.getenv("RENDER_QUEUE_LIMIT", 32))
+RENDER_QUEUE_TIMEOUT = float(os.getenv("RENDER_QUEUE_TIMEOUT", 10))
+render_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS)
+render_slots = asyncio.Semaphore(RENDER_QUEUE_LIMIT)
+
+# Shared non-blocking HTTP session for CDN fetches (created on first use)
+http_session = None
+
+# Output encoding for the puzzle images sent to Discord:
+#   OUTPUT_FORMAT     webp / jpeg / png
+#   OUTPUT_QUALITY    starting quality for webp / jpeg (1-100)
+#   OUTPUT_SCALE      output size relative to the source (the mosaic destroys detail anyway)
+#   OUTPUT_MAX_BYTES  byte budget; quality and then size are lowered until it fits
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "webp").lower()
+OUTPUT_QUALITY = int(os.getenv("OUTPUT_QUALITY", 80))
+OUTPUT_SCALE = float(os.getenv("OUTPUT_SCALE", 0.5))
+OUTPUT_MAX_BYTES = int(os.getenv("OUTPUT_MAX_BYTES", 200 * 1024))
+OUTPUT_MIN_QUALITY = 30
+OUTPUT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg", "png": "png"}
+
+# Difficulty range accepted by !start and !re
+DIFFICULTY_LEVELS = range(1, 11)
+
+# Encoded images of every difficulty for each user's current round, so !re is a
+# cache hit. Only the most recent MAX_ACTIVE_ROUNDS rounds are kept.
+MAX_ACTIVE_ROUNDS = int(os.getenv("MAX_ACTIVE_ROUNDS", 200))
+user_round_renders = OrderedDict()
+
 # Initialize Discord client
 intents = discord.Intents.default()
 intents.message_content = True
 client = discord.Client(intents=intents)
 
-# Dictionary to store the last image URL for each user
-user_last_image_url = {}
-# Dictionary to store the number of games played by each user
-user_game_count = {}
-# Dictionary to store the URLs played by each user
-user_played_urls = {}
+# Speculative prefetch: after a round starts, the player's next image is
+# downloaded and decoded in the background. At most PREFETCH_CONCURRENCY
+# prefetches run at once, and players idle for PREFETCH_IDLE_SECONDS are dropped.
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", 4))
+PREFETCH_IDLE_SECONDS = int(os.getenv("PREFETCH_IDLE_SECONDS", 600))
+prefetch_slots = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+user_last_active = {}
+prefetch_tasks = {}
+idle_sweeper = None
 
+# Puzzle images are drawn from monster numbers 6199-6546
+PUZZLE_FIRST_NUMBER = 6199
+PUZZLE_LAST_NUMBER = 6546
 
-# Function to generate a random odd number between 6533 and 6199
-def get_random_odd_number():
-    res = random.choice([i for i in range(6199, 6547)])
-    print(res)
-    return res
+# Per-user game state (played images, round count, current image) in SQLite,
+# so it survives restarts
+GAME_STATE_DB = os.getenv("GAME_STATE_DB", "game_state.db")
+game_state = GameStateStore(GAME_STATE_DB, PUZZLE_FIRST_NUMBER, PUZZLE_LAST_NUMBER)
 
 
 # Function to apply a mosaic (pixelated) and blur effect
-def apply_mosaic_and_blur(img_array, mosaic_scale=0.04, blur_ksize=(5, 5)):
-    # Get the dimensions of the image
+def apply_mosaic_and_blur(
+    img_array, mosaic_scale=0.04, blur_ksize=(5, 5), output_size=None
+):
+    # Get the dimensions of the image (output defaults to the input size)
     height, width = img_array.shape[:2]
+    output_size = output_size or (width, height)
 
     # Resize the image to a smaller size to create a mosaic effect
     small_img = cv2.resize(
         img_array,
-        (int(width * mosaic_scale), int(height * mosaic_scale)),
+        (max(1, int(width * mosaic_scale)), max(1, int(height * mosaic_scale))),
         interpolation=cv2.INTER_LINEAR,
     )
 
     # Scale the image back up to original size
-    mosaic_img = cv2.resize(small_img, (width, height), interpolation=cv2.INTER_NEAREST)
+    mosaic_img = cv2.resize(small_img, output_size, interpolation=cv2.INTER_NEAREST)
 
     # Apply Gaussian blur to the mosaic image
     blurred_mosaic_img = cv2.GaussianBlur(mosaic_img, blur_ksize, 0)
@@ -58,10 +116,248 @@ def apply_mosaic_and_blur(img_array, mosaic_scale=0.04, blur_ksize=(5, 5)):
     return blurred_mosaic_img
 
 
+# Map a difficulty (1-10) to the mosaic scale and blur kernel size
+def difficulty_settings(difficulty):
+    # Adjust difficulty based on user input
+    difficulty_multiplier = 1 + (difficulty - 1) * 0.2
+    mosaic_scale = max(0.02, 0.04 / difficulty_multiplier)
+
+    # Ensure blur kernel size is always an odd number
+    blur_ksize_value = max(1, int(7 * difficulty_multiplier))  # Ensure it's at least 1
+    if blur_ksize_value % 2 == 0:
+        blur_ksize_value += 1  # Make it odd if it's even
+
+    blur_ksize = (
+        min(15, blur_ksize_value),
+        min(15, blur_ksize_value),
+    )  # Ensure max size is 15
+    return mosaic_scale, blur_ksize
+
+
+# Parse the optional difficulty argument of !start / !re
+def parse_difficulty(content):
+    parts = content.split()
+    if len(parts) == 2 and parts[1].isdigit():
+        difficulty = int(parts[1])
+    else:
+        difficulty = 1  # Default difficulty if not provided
+
+    # Ensure difficulty is within a reasonable range
+    return max(DIFFICULTY_LEVELS[0], min(difficulty, DIFFICULTY_LEVELS[-1]))
+
+
+# Raised when the render queue is full for too long
+class BotBusyError(Exception):
+    pass
+
+
+# Run a blocking function in the render pool, applying backpressure
+async def run_in_render_pool(func, *args):
+    try:
+        await asyncio.wait_for(render_slots.acquire(), RENDER_QUEUE_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise BotBusyError("Bot is busy right now, please try again in a moment.")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(render_pool, func, *args)
+    finally:
+        render_slots.release()
+
+
+async def get_http_session():
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10)
+        )
+    return http_session
+
+
+# Fetch the decoded image without blocking the event loop (atlas -> memory -> disk -> CDN)
+async def load_image(number):
+    if image_atlas is not None and number in image_atlas:
+        return image_atlas.get(number)
+    session = await get_http_session()
+    return await image_cache.get_async(number, session, run_in_render_pool)
+
+
+# Drop the alpha channel by compositing onto white (JPEG has no transparency)
+def flatten_alpha(img_array):
+    if img_array.ndim == 2 or img_array.shape[2] != 4:
+        return img_array
+    alpha = img_array[:, :, 3:4].astype(np.float32) / 255.0
+    color = img_array[:, :, :3].astype(np.float32)
+    return (color * alpha + 255.0 * (1.0 - alpha)).astype(np.uint8)
+
+
+# Encode one attempt straight from the numpy array with OpenCV
+def encode_once(img_array, output_format, quality):
+    if output_format == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    elif output_format == "jpeg":
+        img_array = flatten_alpha(img_array)
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 1]  # fast; the image is blurred anyway
+    ok, encoded = cv2.imencode(f".{OUTPUT_EXTENSIONS[output_format]}", img_array, params)
+    if not ok:
+        raise ValueError(f"Could not encode image as {output_format}")
+    return encoded.tobytes()
+
+
+# Encode a processed image within the byte budget: lower the quality first,
+# then shrink the image until it fits
+def encode_image(img_array):
+    quality = OUTPUT_QUALITY
+    while True:
+        data = encode_once(img_array, OUTPUT_FORMAT, quality)
+        if len(data) <= OUTPUT_MAX_BYTES:
+            return data
+        if OUTPUT_FORMAT != "png" and quality > OUTPUT_MIN_QUALITY:
+            quality = max(OUTPUT_MIN_QUALITY, quality - 15)
+            continue
+        height, width = img_array.shape[:2]
+        if min(height, width) < 64:
+            return data  # Give up shrinking; tiny images are fine to send as is
+        img_array = cv2.resize(
+            img_array,
+            (int(width * 0.75), int(height * 0.75)),
+            interpolation=cv2.INTER_AREA,
+        )
+
+
+# File name sent to Discord, with the extension of the configured format
+def output_filename(name):
+    return f"{name}.{OUTPUT_EXTENSIONS[OUTPUT_FORMAT]}"
+
+
+# Render several difficulties in one pass; runs inside the render pool
+def render_ladder(img_array, difficulties):
+    height, width = img_array.shape[:2]
+
+    # Downscale the full image only once, to the largest mosaic any level needs;
+    # each level's mosaic is then derived from this small base image
+    base_scale = max(difficulty_settings(d)[0] for d in difficulties)
+    base_img = cv2.resize(
+        img_array,
+        (max(1, int(width * base_scale)), max(1, int(height * base_scale))),
+        interpolation=cv2.INTER_AREA,
+    )
+
+    # Upscale the mosaic straight to the (smaller) output size
+    output_size = (
+        max(1, int(width * OUTPUT_SCALE)),
+        max(1, int(height * OUTPUT_SCALE)),
+    )
+
+    rendered = {}
+    for difficulty in difficulties:
+        mosaic_scale, blur_ksize = difficulty_settings(difficulty)
+        # Shrink the blur kernel with the output so each level looks the same
+        ksize = max(1, int(blur_ksize[0] * OUTPUT_SCALE)) | 1
+        blur_ksize = (ksize, ksize)
+        mosaic_blur_img = apply_mosaic_and_blur(
+            base_img,
+            mosaic_scale=mosaic_scale / base_scale,
+            blur_ksize=blur_ksize,
+            output_size=output_size,
+        )
+        rendered[difficulty] = encode_image(mosaic_blur_img)
+    return rendered
+
+
+# Remember a new round and pre-render the remaining difficulties in the background
+def start_round_ladder(user_id, number, img_array, rendered):
+    round_renders = {"number": number, "images": dict(rendered), "ladder": None}
+    user_round_renders[user_id] = round_renders
+    user_round_renders.move_to_end(user_id)
+    while len(user_round_renders) > MAX_ACTIVE_ROUNDS:
+        user_round_renders.popitem(last=False)
+
+    remaining = [d for d in DIFFICULTY_LEVELS if d not in rendered]
+
+    async def prerender():
+        try:
+            images = await run_in_render_pool(render_ladder, img_array, remaining)
+        except Exception as e:
+            # Not fatal: !re falls back to rendering on demand
+            print(f"Pre-render failed for {number}: {e}")
+            return
+        round_renders["images"].update(images)
+
+    round_renders["ladder"] = asyncio.create_task(prerender())
+
+
+# Get the encoded image of a round at a difficulty, from the ladder if possible
+async def get_round_image(user_id, number, difficulty):
+    round_renders = user_round_renders.get(user_id)
+    if round_renders is None or round_renders["number"] != number:
+        round_renders = None
+    elif difficulty not in round_renders["images"] and round_renders["ladder"]:
+        # The ladder is still rendering: wait for it rather than duplicating work
+        await asyncio.shield(round_renders["ladder"])
+
+    if round_renders is not None and difficulty in round_renders["images"]:
+        return round_renders["images"][difficulty]
+
+    img_array = await load_image(number)
+    rendered = await run_in_render_pool(render_ladder, img_array, [difficulty])
+    if round_renders is not None:
+        round_renders["images"].update(rendered)
+    return rendered[difficulty]
+
+
+# Warm the image cache with the user's next candidate image
+def schedule_prefetch(user_id):
+    user_last_active[user_id] = time.monotonic()
+    number = game_state.peek_next_number(user_id)
+    if number is None or image_cache.memory.contains(number):
+        return
+    if image_atlas is not None and number in image_atlas:
+        return  # Already local, nothing to prefetch
+    task = prefetch_tasks.get(user_id)
+    if task is not None and not task.done():
+        return
+    prefetch_tasks[user_id] = asyncio.create_task(prefetch_image(user_id, number))
+
+
+async def prefetch_image(user_id, number):
+    # Prefetch is best effort: skip instead of queueing when the cap is reached
+    # or when real requests are already waiting for the render pool
+    if prefetch_slots.locked() or render_slots.locked():
+        return
+    async with prefetch_slots:
+        if user_id not in user_last_active:
+            return
+        try:
+            await load_image(number)
+        except Exception as e:
+            print(f"Prefetch failed for {number}: {e}")
+        finally:
+            prefetch_tasks.pop(user_id, None)
+
+
+# Forget players that have been idle for too long and cancel their prefetches
+async def expire_idle_users():
+    while True:
+        await asyncio.sleep(60)
+        cutoff = time.monotonic() - PREFETCH_IDLE_SECONDS
+        for user_id, last_active in list(user_last_active.items()):
+            if last_active < cutoff:
+                user_last_active.pop(user_id, None)
+                task = prefetch_tasks.pop(user_id, None)
+                if task is not None:
+                    task.cancel()
+
+
 # Bot startup event
 @client.event
 async def on_ready():
-    print(f"Logged in as {client.user}!")
+    global idle_sweeper
+    if idle_sweeper is None:
+        idle_sweeper = asyncio.create_task(expire_idle_users())
+    removed = image_cache.disk.evict_expired()
+    print(f"Logged in as {client.user}! (evicted {removed} expired cached images)")
 
 
 @client.event
@@ -71,12 +367,6 @@ async def on_message(message):
 
     user_id = message.author.id
 
-    # Initialize user's game count and played URLs if not already initialized
-    if user_id not in user_game_count:
-        user_game_count[user_id] = 0
-    if user_id not in user_played_urls:
-        user_played_urls[user_id] = set()
-
     if message.content.lower() == "!help":
         await message.channel.send(
             f"** COMMAND LIST ** \n\n"
@@ -97,134 +387,70 @@ async def on_message(message):
     # Handle !start <difficulty> command
     if message.content.lower().startswith("!start"):
         # Extract the difficulty level if provided
-        parts = message.content.split()
-        if len(parts) == 2 and parts[1].isdigit():
-            difficulty = int(parts[1])
-        else:
-            difficulty = 1  # Default difficulty if not provided
-
-        # Ensure difficulty is within a reasonable range
-        difficulty = max(1, min(difficulty, 10))  # Limit difficulty between 1 and 10
-
-        # Generate a unique image URL that the user has not played yet
-        while True:
-            random_number = get_random_odd_number()
-            image_url = f"https://dic.xflag.com/monsterstrike/assets-update/img/monster/{random_number}/character.webp"
-            if image_url not in user_played_urls[user_id]:
-                user_last_image_url[user_id] = image_url
-                user_played_urls[user_id].add(image_url)
-                break
-
-        # Increment the user's game count
-        user_game_count[user_id] += 1
-        games_played = user_game_count[user_id]
-
-        # Adjust difficulty based on user input
-        difficulty_multiplier = 1 + (difficulty - 1) * 0.2
-        mosaic_scale = max(0.02, 0.04 / difficulty_multiplier)
-
-        # Ensure blur kernel size is always an odd number
-        blur_ksize_value = max(
-            1, int(7 * difficulty_multiplier)
-        )  # Ensure it's at least 1
-        if blur_ksize_value % 2 == 0:
-            blur_ksize_value += 1  # Make it odd if it's even
-
-        blur_ksize = (
-            min(15, blur_ksize_value),
-            min(15, blur_ksize_value),
-        )  # Ensure max size is 15
+        difficulty = parse_difficulty(message.content)
 
-        try:
-            # Download the image
-            response = requests.get(image_url)
-            img_data = response.content
-            img_array = np.array(Image.open(io.BytesIO(img_data)))
-
-            # Apply mosaic and blur effect with adjusted difficulty
-            mosaic_blur_img = apply_mosaic_and_blur(
-                img_array, mosaic_scale=mosaic_scale, blur_ksize=blur_ksize
+        # Pick the next image the user has not played yet and count the round
+        random_number, games_played, cycle_restarted = game_state.next_number(
+            user_id
+        )
+        if cycle_restarted:
+            await message.channel.send(
+                "You've played every image! Starting over with a new shuffle."
             )
 
-            # Convert the processed image back to PIL format
-            pil_img = Image.fromarray(mosaic_blur_img)
+        try:
+            # Get the decoded image (memory -> disk -> CDN) without blocking
+            img_array = await load_image(random_number)
 
-            # Save the image to a byte stream
-            img_byte_arr = io.BytesIO()
-            pil_img.save(img_byte_arr, format="PNG")
-            img_byte_arr.seek(0)
+            # Render the requested difficulty now; the other levels are
+            # pre-rendered in the background so !re is served from cache
+            rendered = await run_in_render_pool(
+                render_ladder, img_array, [difficulty]
+            )
+            start_round_ladder(user_id, random_number, img_array, rendered)
 
             # Send the pixelated and blurred image as a file back to Discord
             await message.channel.send(
                 f"Round: {games_played}, Difficulty: {difficulty}!"
             )
             await message.channel.send(
-                file=discord.File(fp=img_byte_arr, filename="mosaic_blur_image.png")
+                file=discord.File(
+                    fp=io.BytesIO(rendered[difficulty]),
+                    filename=output_filename("mosaic_blur_image"),
+                )
             )
 
+            # Fetch the next round's image while the user is guessing
+            schedule_prefetch(user_id)
+
+        except BotBusyError as e:
+            await message.channel.send(str(e))
         except Exception as e:
             await message.channel.send(f"Error: {str(e)}")
 
     # Handle !re <difficulty> command to reapply difficulty to the same image
     elif message.content.lower().startswith("!re"):
         # Check if the user has an ongoing game
-        if user_id in user_last_image_url:
+        last_number = game_state.last_number(user_id)
+        if last_number is not None:
             # Extract the difficulty level if provided
-            parts = message.content.split()
-            if len(parts) == 2 and parts[1].isdigit():
-                difficulty = int(parts[1])
-            else:
-                difficulty = 1  # Default difficulty if not provided
-
-            # Ensure difficulty is within a reasonable range
-            difficulty = max(
-                1, min(difficulty, 10)
-            )  # Limit difficulty between 1 and 10
-
-            # Adjust difficulty based on user input
-            difficulty_multiplier = 1 + (difficulty - 1) * 0.2
-            mosaic_scale = max(0.02, 0.04 / difficulty_multiplier)
-
-            # Ensure blur kernel size is always an odd number
-            blur_ksize_value = max(
-                1, int(7 * difficulty_multiplier)
-            )  # Ensure it's at least 1
-            if blur_ksize_value % 2 == 0:
-                blur_ksize_value += 1  # Make it odd if it's even
-
-            blur_ksize = (
-                min(15, blur_ksize_value),
-                min(15, blur_ksize_value),
-            )  # Ensure max size is 15
+            difficulty = parse_difficulty(message.content)
 
             try:
-                # Get the last image URL and download the image
-                image_url = user_last_image_url[user_id]
-                response = requests.get(image_url)
-                img_data = response.content
-                img_array = np.array(Image.open(io.BytesIO(img_data)))
-
-                # Apply mosaic and blur effect with new difficulty
-                mosaic_blur_img = apply_mosaic_and_blur(
-                    img_array, mosaic_scale=mosaic_scale, blur_ksize=blur_ksize
-                )
-
-                # Convert the processed image back to PIL format
-                pil_img = Image.fromarray(mosaic_blur_img)
-
-                # Save the image to a byte stream
-                img_byte_arr = io.BytesIO()
-                pil_img.save(img_byte_arr, format="PNG")
-                img_byte_arr.seek(0)
+                # Served from the pre-rendered difficulty ladder of this round
+                image_bytes = await get_round_image(user_id, last_number, difficulty)
 
                 # Send the updated image back to Discord
                 await message.channel.send(f"Reapplied difficulty: {difficulty}!")
                 await message.channel.send(
                     file=discord.File(
-                        fp=img_byte_arr, filename="reapplied_mosaic_blur_image.png"
+                        fp=io.BytesIO(image_bytes),
+                        filename=output_filename("reapplied_mosaic_blur_image"),
                     )
                 )
 
+            except BotBusyError as e:
+                await message.channel.send(str(e))
             except Exception as e:
                 await message.channel.send(f"Error: {str(e)}")
         else:
@@ -232,19 +458,20 @@ async def on_message(message):
 
     # Handle !giveup command
     elif message.content.lower() == "!giveup":
-        if user_id in user_last_image_url:
+        last_number = game_state.last_number(user_id)
+        if last_number is not None:
             # Send the original image URL
-            await message.channel.send(f"Answer:|| {user_last_image_url[user_id]} ||")
+            await message.channel.send(f"Answer:|| {image_url(last_number)} ||")
         else:
             # Notify the user that they haven't started a game yet
             await message.channel.send("還沒開始就認輸喔==")
 
     # Handle !reset command
     elif message.content.lower() == "!reset":
-        if user_id in user_game_count:
-            # Reset the game count and last image URL
-            user_game_count[user_id] = 0
-            user_last_image_url.pop(user_id, None)
+        if game_state.has_player(user_id):
+            # Reset the game count and last image
+            game_state.reset(user_id)
+            user_round_renders.pop(user_id, None)
             await message.channel.send("Game has been reset!")
         else:
             await message.channel.send("You haven't started any game yet!")
@@ -252,10 +479,9 @@ async def on_message(message):
     # Handle !guess <character name> command
     elif message.content.lower().startswith("!guess "):
         guess = message.content[7:].strip()
-        if user_id in user_last_image_url:
-            correct_name = character_names_mapping.get(
-                user_last_image_url[user_id], None
-            )
+        last_number = game_state.last_number(user_id)
+        if last_number is not None:
+            correct_name = character_names_mapping.get(image_url(last_number), None)
             if correct_name and guess.lower() == correct_name.lower():
                 await message.channel.send("作弊吧老🈹!")
             else:
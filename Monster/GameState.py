@@ -0,0 +1,122 @@
+import random
+import sqlite3
+import time
+from array import array
+
+
+class GameStateStore:
+    """
+    Per-user game state persisted in SQLite.
+
+    Each player gets a shuffled permutation of the puzzle range plus a cursor,
+    so picking the next unplayed image is O(1) and every image is shown exactly
+    once per cycle. The permutation is stored as 2-byte offsets (~700 bytes per
+    player for the 348-image range) instead of a growing set of URLs.
+    """
+
+    def __init__(self, db_path, first_number, last_number):
+        self.first_number = first_number
+        self.size = last_number - first_number + 1
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS players (
+                user_id INTEGER PRIMARY KEY,
+                permutation BLOB NOT NULL,
+                cursor INTEGER NOT NULL,
+                game_count INTEGER NOT NULL,
+                last_number INTEGER,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    def _new_permutation(self):
+        offsets = array("H", range(self.size))
+        random.shuffle(offsets)
+        return offsets
+
+    def _load(self, user_id):
+        row = self.conn.execute(
+            "SELECT permutation, cursor, game_count, last_number FROM players "
+            "WHERE user_id = ?",
+            (user_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        permutation = array("H")
+        permutation.frombytes(row[0])
+        return permutation, row[1], row[2], row[3]
+
+    def _state(self, user_id):
+        state = self._load(user_id)
+        # Start a fresh cycle for new players or when the puzzle range changed
+        if state is None or len(state[0]) != self.size:
+            game_count = state[2] if state else 0
+            last_number = state[3] if state else None
+            return self._new_permutation(), 0, game_count, last_number
+        return state
+
+    def next_number(self, user_id):
+        """
+        Pick the user's next unplayed image and count the round.
+        Returns (number, game_count, cycle_restarted).
+        """
+        permutation, cursor, game_count, _ = self._state(user_id)
+        cycle_restarted = False
+        if cursor >= len(permutation):
+            # Every image has been played: reshuffle and start a new cycle
+            permutation, cursor = self._new_permutation(), 0
+            cycle_restarted = True
+
+        number = self.first_number + permutation[cursor]
+        game_count += 1
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO players "
+                "(user_id, permutation, cursor, game_count, last_number, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    user_id,
+                    permutation.tobytes(),
+                    cursor + 1,
+                    game_count,
+                    number,
+                    time.time(),
+                ),
+            )
+        return number, game_count, cycle_restarted
+
+    def peek_next_number(self, user_id):
+        """The image the next !start would pick, without consuming it."""
+        state = self._load(user_id)
+        if state is None or len(state[0]) != self.size or state[1] >= len(state[0]):
+            return None
+        permutation, cursor = state[0], state[1]
+        return self.first_number + permutation[cursor]
+
+    def last_number(self, user_id):
+        row = self.conn.execute(
+            "SELECT last_number FROM players WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def has_player(self, user_id):
+        row = self.conn.execute(
+            "SELECT 1 FROM players WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        return row is not None
+
+    def reset(self, user_id):
+        """Reset the game count and current image; the played history is kept."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE players SET game_count = 0, last_number = NULL, updated_at = ? "
+                "WHERE user_id = ?",
+                (time.time(), user_id),
+            )
+
+    def close(self):
+        self.conn.close()
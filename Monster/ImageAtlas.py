@@ -0,0 +1,157 @@
+"""
+Pack the downloaded character images into a single memory-mapped atlas file.
+
+Layout (little endian):
+    header   8s magic, uint32 count, uint32 reserved
+    index    count x (uint32 number, uint64 offset, uint32 height, uint32 width, uint32 channels)
+    pixels   raw uint8 BGR / BGRA data for each entry, 64-byte aligned
+
+Usage:
+    python ImageAtlas.py --source ./Downloads/downloaded_Char --output monster_atlas.bin
+"""
+
+import os
+import mmap
+import struct
+import argparse
+
+import cv2
+import numpy as np
+
+ATLAS_MAGIC = b"MSATLAS1"
+HEADER_FORMAT = "<8sII"
+ENTRY_FORMAT = "<IQIII"
+ALIGNMENT = 64
+
+
+def align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+# Decode one downloaded image and shrink it so its longest side fits max_side
+def load_source_image(path, max_side):
+    data = np.fromfile(path, dtype=np.uint8)
+    img_array = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    if img_array is None:
+        return None
+    if img_array.ndim == 2:
+        img_array = cv2.cvtColor(img_array, cv2.COLOR_GRAY2BGR)
+
+    height, width = img_array.shape[:2]
+    if max_side and max(height, width) > max_side:
+        scale = max_side / max(height, width)
+        img_array = cv2.resize(
+            img_array,
+            (max(1, int(width * scale)), max(1, int(height * scale))),
+            interpolation=cv2.INTER_AREA,
+        )
+    return np.ascontiguousarray(img_array)
+
+
+# Build the atlas from a folder of <number>.png / <number>.webp files
+def pack_atlas(source_folder, output_path, max_side=1024, first=None, last=None):
+    sources = []
+    for name in os.listdir(source_folder):
+        stem, _ = os.path.splitext(name)
+        if not stem.isdigit():
+            continue
+        number = int(stem)
+        if (first is not None and number < first) or (last is not None and number > last):
+            continue
+        sources.append((number, os.path.join(source_folder, name)))
+    sources.sort()
+
+    header_size = struct.calcsize(HEADER_FORMAT)
+    entry_size = struct.calcsize(ENTRY_FORMAT)
+    # Reserve index space for every candidate; undecodable images just leave
+    # unused slots, since readers only walk the first `count` entries
+    offset = align(header_size + entry_size * len(sources))
+
+    # Stream one image at a time so memory stays at a single decoded image,
+    # then go back and write the header and index.
+    # Write to a temp file and rename, so running bots never map a half-written atlas
+    temp_path = f"{output_path}.tmp"
+    entries = []
+    with open(temp_path, "wb") as file:
+        for number, path in sources:
+            img_array = load_source_image(path, max_side)
+            if img_array is None:
+                print(f"Skipping undecodable image: {path}")
+                continue
+            height, width = img_array.shape[:2]
+            channels = img_array.shape[2]
+            file.seek(offset)
+            file.write(img_array.data)
+            entries.append((number, offset, height, width, channels))
+            offset = align(offset + img_array.nbytes)
+
+        file.seek(0)
+        file.write(struct.pack(HEADER_FORMAT, ATLAS_MAGIC, len(entries), 0))
+        for entry in entries:
+            file.write(struct.pack(ENTRY_FORMAT, *entry))
+        # Pad to the final aligned size so the last entry's mapping is complete
+        file.truncate(offset)
+    os.replace(temp_path, output_path)
+    print(f"Packed {len(entries)} images into {output_path} ({offset} bytes)")
+    return len(entries)
+
+
+class ImageAtlas:
+    """
+    Read-only, memory-mapped view of an atlas file. get() returns numpy arrays
+    that point straight into the mapping: no HTTP, no decode, no copy, and the
+    pages are shared by every process that maps the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, count, _ = struct.unpack_from(HEADER_FORMAT, self._map, 0)
+        if magic != ATLAS_MAGIC:
+            raise ValueError(f"{path} is not an image atlas")
+
+        self._index = {}
+        position = struct.calcsize(HEADER_FORMAT)
+        entry_size = struct.calcsize(ENTRY_FORMAT)
+        for _ in range(count):
+            number, offset, height, width, channels = struct.unpack_from(
+                ENTRY_FORMAT, self._map, position
+            )
+            self._index[number] = (offset, (height, width, channels))
+            position += entry_size
+
+    def __contains__(self, number):
+        return number in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def numbers(self):
+        return sorted(self._index)
+
+    def get(self, number):
+        offset, shape = self._index[number]
+        # Arrays backed by an ACCESS_READ mmap are read-only, like cached arrays
+        return np.ndarray(shape, dtype=np.uint8, buffer=self._map, offset=offset)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack character images into an atlas")
+    parser.add_argument("--source", default="./Downloads/downloaded_Char")
+    parser.add_argument("--output", default="monster_atlas.bin")
+    parser.add_argument(
+        "--max-side",
+        type=int,
+        default=1024,
+        help="downscale so the longest side fits (0 keeps the original size)",
+    )
+    parser.add_argument("--first", type=int, help="lowest monster number to include")
+    parser.add_argument("--last", type=int, help="highest monster number to include")
+    args = parser.parse_args()
+    pack_atlas(args.source, args.output, args.max_side, args.first, args.last)
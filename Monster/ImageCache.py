@@ -0,0 +1,154 @@
+import os
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+IMAGE_URL_TEMPLATE = "https://dic.xflag.com/monsterstrike/assets-update/img/monster/{number}/character.webp"
+
+
+# Build the character image URL for a monster number
+def image_url(number):
+    return IMAGE_URL_TEMPLATE.format(number=number)
+
+
+# Decode raw image bytes into a read-only numpy array (BGR / BGRA, OpenCV order)
+def decode_image(data):
+    img_array = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_UNCHANGED)
+    if img_array is None:
+        raise ValueError("Could not decode image")
+    # Cached arrays are shared between rounds, so make sure nobody mutates them
+    img_array.flags.writeable = False
+    return img_array
+
+
+class MemoryLRU:
+    """In-process LRU of decoded arrays, bounded by total bytes rather than count."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            img_array = self._items.get(key)
+            if img_array is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return img_array
+
+    def contains(self, key):
+        # Membership check that does not count as a hit or refresh the LRU order
+        with self._lock:
+            return key in self._items
+
+    def put(self, key, img_array):
+        # Skip items that could never fit instead of flushing the whole cache
+        if img_array.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.nbytes
+            self._items[key] = img_array
+            self.current_bytes += img_array.nbytes
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+
+class DiskCache:
+    """On-disk cache of the raw WebP bytes with TTL eviction based on file mtime."""
+
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, number):
+        return os.path.join(self.directory, f"{number}.webp")
+
+    def get(self, number):
+        path = self._path(number)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, number, data):
+        # Write to a temp file first so a crash never leaves a truncated image
+        path = self._path(number)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+    def evict_expired(self):
+        removed = 0
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class ImageCache:
+    """
+    Two-tier image cache keyed by monster number:
+    decoded arrays in memory first, then raw bytes on disk, then the CDN.
+    """
+
+    def __init__(self, memory_bytes, disk_directory, disk_ttl):
+        self.memory = MemoryLRU(memory_bytes)
+        self.disk = DiskCache(disk_directory, disk_ttl)
+        # Concurrent requests for the same number share one download/decode
+        self._in_flight = {}
+
+    async def get_async(self, number, session, run_blocking):
+        """
+        Load an image without blocking the event loop: the CDN fetch uses the
+        given aiohttp session, disk I/O and decoding go through run_blocking
+        (an async callable that runs a function in a worker pool).
+        """
+        img_array = self.memory.get(number)
+        if img_array is not None:
+            return img_array
+
+        pending = self._in_flight.get(number)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._load(number, session, run_blocking)
+            )
+            self._in_flight[number] = pending
+            pending.add_done_callback(lambda _: self._in_flight.pop(number, None))
+        return await asyncio.shield(pending)
+
+    async def _load(self, number, session, run_blocking):
+        data = await run_blocking(self.disk.get, number)
+        if data is None:
+            async with session.get(image_url(number)) as response:
+                response.raise_for_status()
+                data = await response.read()
+            await run_blocking(self.disk.put, number, data)
+
+        img_array = await run_blocking(decode_image, data)
+        self.memory.put(number, img_array)
+        return img_array
@@ -0,0 +1,182 @@
+import os
+import json
+import shutil
+import time
+import zlib
+import hashlib
+import zipfile
+import warnings
+
+# 已壓縮過的圖片格式直接以 STORED 存放，再 deflate 只會浪費 CPU
+stored_extensions = {".webp", ".png", ".jpg", ".jpeg", ".gif"}
+
+# 去重模式下，檔名與 blob 雜湊的對照表
+reference_member = "index.json"
+
+# 下載中的暫存檔 (.part、續傳驗證資訊與建立中的硬連結)，不能放進 ZIP
+temporary_suffixes = (".part", ".validator", ".link")
+
+
+def is_valid_zip(path):
+    """檔尾的中央目錄完整且可以讀出成員清單。"""
+    if not zipfile.is_zipfile(path):
+        return False
+    try:
+        with zipfile.ZipFile(path) as archive:
+            archive.infolist()
+    except (zipfile.BadZipFile, OSError):
+        return False
+    return True
+
+
+class IncrementalZip:
+    """
+    只追加 (append-only) 的 ZIP：下載完成的內容直接寫入，
+    內容未變更的成員不重寫，變更的成員以同名新條目附加在後面 (讀取時以最後一筆為準)。
+    寫入期間操作的是 <zip>.tmp 副本，close() 後才取代原檔。
+
+    dedup=True 時每份內容只以 blobs/<sha256><blob_extension> 存一次，
+    檔名與雜湊的對照記錄在 index.json。
+    """
+
+    def __init__(self, zip_path, compact_ratio=0.3, dedup=False, blob_extension=".webp"):
+        self.zip_path = zip_path
+        self.compact_ratio = compact_ratio
+        self.dedup = dedup
+        self.blob_extension = blob_extension
+        self.added = 0
+        self._open()
+
+    def _open(self):
+        # 新成員寫在暫存副本，close() 時才以 os.replace 換掉原檔：
+        # 執行中斷只會留下沒用的暫存副本，原本的 ZIP 仍然完整
+        self.work_path = f"{self.zip_path}.tmp"
+        if os.path.exists(self.zip_path) and not is_valid_zip(self.zip_path):
+            # 舊版直接附加寫入時中斷，中央目錄已遺失，重新建立
+            print(f"ZIP 損毀，重新建立: {self.zip_path}")
+            os.remove(self.zip_path)
+        if os.path.exists(self.zip_path):
+            shutil.copyfile(self.zip_path, self.work_path)
+        elif os.path.exists(self.work_path):
+            os.remove(self.work_path)
+        self._load()
+
+    def _load(self):
+        self.zip = zipfile.ZipFile(self.work_path, "a")
+
+        # 同名成員以最後一筆為準
+        self.index = {}
+        for info in self.zip.infolist():
+            self.index[info.filename] = (info.CRC, info.file_size)
+        self.stale = len(self.zip.infolist()) - len(self.index)
+
+        self.references = {}
+        self._references_dirty = False
+        if self.dedup and reference_member in self.index:
+            self.references = json.loads(self.zip.read(reference_member))
+
+    def add(self, name, data):
+        """寫入一個成員，內容相同時直接略過。回傳是否有寫入。"""
+        crc = zlib.crc32(data)
+        if self.index.get(name) == (crc, len(data)):
+            return False
+
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        if os.path.splitext(name)[1].lower() in stored_extensions:
+            info.compress_type = zipfile.ZIP_STORED
+        else:
+            info.compress_type = zipfile.ZIP_DEFLATED
+
+        if name in self.index:
+            self.stale += 1
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)  # Duplicate name
+            self.zip.writestr(info, data)
+        self.index[name] = (crc, len(data))
+        self.added += 1
+        return True
+
+    def add_file(self, name, file_path):
+        """從磁碟上的檔案寫入成員，內容相同時直接略過。回傳是否有寫入。"""
+        with open(file_path, "rb") as handler:
+            return self.add(name, handler.read())
+
+    def blob_member(self, digest):
+        return f"blobs/{digest}{self.blob_extension}"
+
+    def add_blob(self, name, digest, file_path):
+        """去重模式：內容尚未收錄時才寫入 blob，並記錄 name 指向的雜湊。"""
+        member = self.blob_member(digest)
+        written = False
+        if member not in self.index:
+            written = self.add_file(member, file_path)
+        if self.references.get(name) != digest:
+            self.references[name] = digest
+            self._references_dirty = True
+        return written
+
+    def sync_folder(self, folder_path, changed_since=None, digests=None):
+        """
+        把資料夾中尚未收錄或已變更的檔案補進 ZIP，用於第一次啟用或合併後補齊。
+        未指定 changed_since 時只比對大小 (快速)；指定時，之後修改過的檔案改以 CRC 比對。
+        去重模式下 digests ({檔名: sha256}) 有紀錄的檔案直接以雜湊比對，不需讀檔。
+        """
+        for name in sorted(os.listdir(folder_path)):
+            file_path = os.path.join(folder_path, name)
+            if not os.path.isfile(file_path) or name.endswith(temporary_suffixes):
+                continue
+            changed = (
+                changed_since is not None
+                and os.path.getmtime(file_path) >= changed_since
+            )
+            if self.dedup:
+                digest = digests.get(name) if digests else None
+                if digest is not None:
+                    if (
+                        self.references.get(name) != digest
+                        or self.blob_member(digest) not in self.index
+                    ):
+                        self.add_blob(name, digest, file_path)
+                    continue
+                digest = self.references.get(name)
+                if (
+                    digest is not None
+                    and not changed
+                    and self.index.get(self.blob_member(digest), (0, -1))[1]
+                    == os.path.getsize(file_path)
+                ):
+                    continue
+                with open(file_path, "rb") as handler:
+                    digest = hashlib.sha256(handler.read()).hexdigest()
+                self.add_blob(name, digest, file_path)
+                continue
+            entry = self.index.get(name)
+            if entry is not None and not changed and entry[1] == os.path.getsize(file_path):
+                continue
+            # add() 會以 CRC 比對，內容相同時不會重寫
+            self.add_file(name, file_path)
+
+    def compact(self):
+        """重寫 ZIP，只保留每個名稱的最新一筆。"""
+        compact_path = f"{self.zip_path}.compact"
+        with zipfile.ZipFile(compact_path, "w") as target:
+            latest = {}
+            for info in self.zip.infolist():
+                latest[info.filename] = info
+            for info in latest.values():
+                target.writestr(info, self.zip.read(info))
+        self.zip.close()
+        os.replace(compact_path, self.work_path)
+        self._load()
+
+    def close(self):
+        if self._references_dirty:
+            data = json.dumps(self.references, sort_keys=True).encode("utf-8")
+            self.add(reference_member, data)
+            self._references_dirty = False
+        total = len(self.index) + self.stale
+        if total and self.stale / total > self.compact_ratio:
+            print(f"過期條目過多，整理 ZIP: {self.zip_path}")
+            self.compact()
+        self.zip.close()
+        os.replace(self.work_path, self.zip_path)
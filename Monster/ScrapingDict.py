@@ -1,56 +1,567 @@
 import os
-import requests
+import sys
 import time
-import shutil
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import asyncio
+import zipfile
+import argparse
+import aiohttp
+from concurrent.futures import ProcessPoolExecutor
+
+# 讓其他程式以 Monster.ScrapingDict 匯入時也找得到同資料夾的模組
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from SyncManifest import SyncManifest
+from IncrementalZip import IncrementalZip, temporary_suffixes
+from Transcode import Transcoder
+from BlobStore import BlobStore, default_extension as blob_extension
 
 # 設定角色和球的基礎資料夾
 char_folder = os.path.expanduser("./Downloads/downloaded_Char")
 ball_folder = os.path.expanduser("./Downloads/downloaded_Ball")
 
-# 如果資料夾不存在，則建立資料夾
-os.makedirs(char_folder, exist_ok=True)
-os.makedirs(ball_folder, exist_ok=True)
+# 同步紀錄 (ETag / Last-Modified / 雜湊) 放在角色與球資料夾旁
+manifest_path = os.path.join(os.path.dirname(char_folder), "manifest.db")
+
+# 圖片來源
+asset_base_url = "https://dic.xflag.com/monsterstrike/assets-update/img/monster"
 
-# 下載圖片的範圍
+# 下載圖片的範圍，end_number 為 None 時以 HEAD 請求自動探測目前的編號上限
 start_number = 1
-end_number = 7000
+end_number = None
+
+# 探測上限時，連續這麼多個編號都不存在才視為超出範圍 (編號並不連續)
+probe_window = 32
+
+# 探測的硬上限：伺服器對任何編號都回 200 (soft-404 / 佔位圖) 時，倍增不會停止；
+# 到達時不掃描到這裡，改用已知的最大編號，沒有紀錄時要求以 --end 指定
+probe_ceiling = 100000
+
+# 負向快取：確認不存在的編號在這段時間內不再請求。
+# 只套用在上次同步已知的最大編號以內；超出的部分是新角色會出現的位置，每次都重新確認
+missing_ttl = 7 * 24 * 3600
+
+# 並行數由 AIMD 自動調整，這裡只設定起始值與上下限
+initial_concurrency = 25
+min_concurrency = 4
+max_concurrency = 200
+
+# True 時下載內容直接寫進只追加的 ZIP，只有新增或變更的圖片會被加入；
+# False 時沿用下載完成後整個資料夾重新壓縮的方式
+stream_to_zip = True
+
+# 去重 (選用)：相同內容只在 blobs 存一份，各編號的檔案以硬連結指向它，
+# ZIP 內也只存一份 (blobs/<sha256>.webp + index.json 對照表)
+dedup_enabled = False
+blob_folder = os.path.join(os.path.dirname(char_folder), "blobs")
+
+# 轉檔階段 (選用)：下載同時以行程池把 WebP 轉成真正的 PNG (或保留 WebP 並用正確副檔名)，
+# 並產生指定尺寸的縮圖，輸出到 transcoded_Char / transcoded_Ball
+transcode_enabled = False
+transcode_format = "png"  # "png" 或 "webp"
+thumbnail_sizes = (256, 128)
+transcode_workers = None  # None 代表使用所有核心
+transcoded_folders = {
+    "character": os.path.join(os.path.dirname(char_folder), "transcoded_Char"),
+    "ball": os.path.join(os.path.dirname(ball_folder), "transcoded_Ball"),
+}
+
+# 本機行程數：每個核心一個行程，各自以 asyncio 下載自己的分片 (並行額度平分給各行程)
+process_count = os.cpu_count() or 1
+
+# 串流寫檔時每次讀取的大小
+chunk_size = 64 * 1024
+
+# 逾時或伺服器忙碌 (429/5xx) 時的重試次數
+max_retries = 3
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 並行上限：延遲穩定時每輪 +1，逾時或 429/5xx 時減半。
+    """
+
+    def __init__(
+        self, initial, minimum, maximum, latency_tolerance=1.5, window=50
+    ):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_tolerance = latency_tolerance
+        self.window = window
+        self.in_flight = 0
+        self.peak_limit = initial
+        self._cond = asyncio.Condition()
+        self._baseline = None  # 觀測到的最低平均延遲
+        self._samples = []
+        self._successes = 0
+        self._last_decrease = 0.0
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self, latency, congested=False):
+        async with self._cond:
+            self.in_flight -= 1
+            if congested:
+                self._decrease()
+            else:
+                self._observe(latency)
+            self._cond.notify_all()
+
+    def _decrease(self):
+        # 同一波壅塞只減半一次，避免所有進行中的請求連續砍到最低
+        now = time.monotonic()
+        cooldown = self._baseline or 1.0
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit // 2)
+        self._samples.clear()
+        self._successes = 0
+
+    def _observe(self, latency):
+        self._samples.append(latency)
+        if len(self._samples) > self.window:
+            self._samples.pop(0)
+        average = sum(self._samples) / len(self._samples)
+        if len(self._samples) == self.window:
+            if self._baseline is None or average < self._baseline:
+                self._baseline = average
+
+        # 每完成 limit 個成功請求視為一輪，延遲未明顯上升才加 1
+        self._successes += 1
+        if self._successes < self.limit:
+            return
+        self._successes = 0
+        if self._baseline is None or average <= self._baseline * self.latency_tolerance:
+            self.limit = min(self.maximum, self.limit + 1)
+            self.peak_limit = max(self.peak_limit, self.limit)
+
+
+class SweepContext:
+    """一次下載作業共用的連線、並行控制與同步紀錄。"""
+
+    def __init__(
+        self,
+        session,
+        limiter,
+        manifest,
+        archives=None,
+        transcoder=None,
+        blobs=None,
+        frontier=0,
+    ):
+        self.session = session
+        self.limiter = limiter
+        self.manifest = manifest
+        # 開始下載前已知的最大編號，超過它的 404 不寫入負向快取
+        self.frontier = frontier
+        self.archives = archives or {}
+        self.transcoder = transcoder
+        self.blobs = blobs
+
+
+def schedule_transcode(ctx, number, kind, file_path, digest):
+    if ctx.transcoder is not None:
+        ctx.transcoder.submit(
+            number, kind, file_path, digest, transcoded_folders[kind]
+        )
+
+
+def asset_url(number, kind):
+    return f"{asset_base_url}/{number}/{kind}.webp"
+
+
+def request_headers(manifest, file_path, part_path, number, kind):
+    """
+    決定這次請求要帶的標頭。
+    有未完成的 .part 且有驗證資訊時以 Range 續傳，否則檔案完整時送條件式請求。
+    回傳 (headers, resume_from)。
+    """
+    validator_path = f"{part_path}.validator"
+    if os.path.exists(part_path) and os.path.exists(validator_path):
+        with open(validator_path, "r") as f:
+            validator = f.read().strip()
+        offset = os.path.getsize(part_path)
+        if validator and offset > 0:
+            # If-Range：伺服器上的檔案已變更時會回完整的 200 而不是 206
+            return {"Range": f"bytes={offset}-", "If-Range": validator}, offset
+
+    entry = manifest.get(number, kind)
+    if (
+        entry is not None
+        and os.path.exists(file_path)
+        and os.path.getsize(file_path) == entry["size"]
+    ):
+        return manifest.conditional_headers(number, kind), 0
+
+    # 大小與紀錄不符 (例如舊版中斷留下的殘檔) 時視為不存在，重新完整下載
+    return {}, 0
+
+
+async def stream_to_part(response, part_path, resume_from):
+    """把回應內容分段寫入 .part，回傳 (大小, sha256)。"""
+    sha256 = hashlib.sha256()
+    if resume_from:
+        # 續傳時先把已下載的部分算進雜湊
+        with open(part_path, "rb") as handler:
+            for chunk in iter(lambda: handler.read(chunk_size), b""):
+                sha256.update(chunk)
+        mode = "ab"
+    else:
+        mode = "wb"
+        validator = response.headers.get("ETag") or response.headers.get(
+            "Last-Modified"
+        )
+        with open(f"{part_path}.validator", "w") as f:
+            f.write(validator or "")
+
+    size = resume_from
+    with open(part_path, mode) as handler:
+        async for chunk in response.content.iter_chunked(chunk_size):
+            handler.write(chunk)
+            sha256.update(chunk)
+            size += len(chunk)
+    return size, sha256.hexdigest()
+
+
+def discard_part(part_path):
+    for path in (part_path, f"{part_path}.validator"):
+        if os.path.exists(path):
+            os.remove(path)
 
 
 # 定義下載並儲存圖片的函式
-def download_image(url, folder, filename):
+async def download_image(ctx, url, folder, filename, number, kind):
+    session, limiter, manifest = ctx.session, ctx.limiter, ctx.manifest
     file_path = os.path.join(folder, filename)
+    # 下載中的內容先寫到 .part，完成後才原子性地改名，中斷時不會留下殘缺的正式檔案
+    part_path = f"{file_path}.part"
 
-    # 檢查圖片是否已經存在
-    if os.path.exists(file_path):
-        print(f"圖片已存在，跳過: {filename}")
-        return
+    for attempt in range(max_retries + 1):
+        headers, resume_from = request_headers(
+            manifest, file_path, part_path, number, kind
+        )
+        await limiter.acquire()
+        start = time.monotonic()
+        congested = False
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    manifest.touch(number, kind)
+                    print(f"圖片未變更，跳過: {filename}")
+                    entry = manifest.get(number, kind)
+                    schedule_transcode(ctx, number, kind, file_path, entry["sha256"])
+                    return
+                if response.status == 416:
+                    # 續傳位置超出檔案大小，.part 已不可信
+                    discard_part(part_path)
+                    continue
+                if response.status in (200, 206):
+                    if response.status == 200:
+                        resume_from = 0
+                    else:
+                        print(f"從 {resume_from} bytes 續傳: {filename}")
+                    size, digest = await stream_to_part(
+                        response, part_path, resume_from
+                    )
+                    previous = manifest.get(number, kind)
+                    if (
+                        previous is not None
+                        and previous["sha256"] == digest
+                        and os.path.exists(file_path)
+                    ):
+                        os.remove(part_path)
+                        print(f"圖片內容相同，跳過: {filename}")
+                    elif ctx.blobs is not None:
+                        ctx.blobs.commit(part_path, digest, file_path)
+                        print(f"圖片已下載: {filename}")
+                        if kind in ctx.archives:
+                            ctx.archives[kind].add_blob(filename, digest, file_path)
+                    else:
+                        os.replace(part_path, file_path)
+                        print(f"圖片已下載: {filename}")
+                        if kind in ctx.archives:
+                            ctx.archives[kind].add_file(filename, file_path)
+                    discard_part(part_path)
+                    manifest.record(
+                        number,
+                        kind,
+                        response.headers.get("ETag"),
+                        response.headers.get("Last-Modified"),
+                        size,
+                        digest,
+                    )
+                    schedule_transcode(ctx, number, kind, file_path, digest)
+                    return
+                if response.status == 429 or response.status >= 500:
+                    congested = True
+                    print(f"伺服器忙碌 ({response.status})，稍後重試: {filename}")
+                else:
+                    discard_part(part_path)
+                    if number <= ctx.frontier:
+                        manifest.mark_missing(number, kind)
+                    print(f"圖片不存在，跳過: {filename}")
+                    return
+        except asyncio.TimeoutError:
+            congested = True
+            print(f"下載逾時，稍後重試: {filename}")
+        except (aiohttp.ClientPayloadError, aiohttp.ServerDisconnectedError) as e:
+            # 傳輸中斷，保留 .part 讓下一次嘗試續傳
+            print(f"傳輸中斷，稍後續傳: {filename}，錯誤訊息: {e}")
+        except aiohttp.ClientError as e:
+            print(f"下載失敗，跳過: {filename}，錯誤訊息: {e}")
+            return
+        finally:
+            await limiter.release(time.monotonic() - start, congested)
+
+        # 指數退避後再試
+        await asyncio.sleep(0.5 * 2**attempt)
+
+    print(f"重試次數用盡，跳過: {filename}")
 
+
+# 定義主要下載邏輯
+async def download_images_for_number(ctx, number, kinds=("character", "ball")):
+    # 角色和球的存放位置 (檔名都是 編號.png)
+    folders = {"character": char_folder, "ball": ball_folder}
+    filename = f"{number}.png"
+
+    # 下載角色和球的圖片
+    await asyncio.gather(
+        *(
+            download_image(
+                ctx, asset_url(number, kind), folders[kind], filename, number, kind
+            )
+            for kind in kinds
+        )
+    )
+
+
+async def probe_exists(ctx, number):
+    """以 HEAD 請求確認角色圖片是否存在，不下載內容。"""
+    await ctx.limiter.acquire()
+    start = time.monotonic()
+    congested = False
     try:
-        response = requests.get(url, timeout=10)
-        if response.status_code == 200:
-            with open(file_path, "wb") as handler:
-                handler.write(response.content)
-            print(f"圖片已下載: {filename}")
+        async with ctx.session.head(asset_url(number, "character")) as response:
+            if response.status == 429 or response.status >= 500:
+                congested = True
+            return response.status == 200
+    except asyncio.TimeoutError:
+        congested = True
+        return False
+    except aiohttp.ClientError:
+        return False
+    finally:
+        await ctx.limiter.release(time.monotonic() - start, congested)
+
+
+async def exists_near(ctx, number):
+    # 編號有空洞，一次檢查一整段，任一存在即代表尚未超出範圍
+    results = await asyncio.gather(
+        *(probe_exists(ctx, n) for n in range(number, number + probe_window))
+    )
+    return any(results)
+
+
+class ProbeError(Exception):
+    """無法自動探測編號上限，需要以 --end 指定。"""
+
+
+def probe_fallback(ctx):
+    """
+    探測到硬上限仍有回應，代表伺服器對不存在的編號也回 200，探測結果不可信。
+    改用上次同步已知的最大編號；沒有紀錄時停止，而不是掃描到硬上限。
+    """
+    known = ctx.manifest.max_known_number()
+    message = (
+        f"探測到硬上限 {probe_ceiling} 仍有回應，伺服器可能對不存在的編號也回 200，"
+        "請以 --end 指定編號上限"
+    )
+    if not known:
+        raise ProbeError(message)
+    print(f"{message}；這次改用已知的最大編號 {known}")
+    return known
+
+
+async def discover_upper_bound(ctx, start):
+    """
+    先以倍增找出第一個「整段都不存在」的位置，再二分搜尋實際上限。
+    """
+    low = max(start, ctx.manifest.max_known_number(), 1)
+    if not await exists_near(ctx, low):
+        return low + probe_window - 1
+
+    high = min(low * 2, probe_ceiling)
+    while await exists_near(ctx, high):
+        if high >= probe_ceiling:
+            return probe_fallback(ctx)
+        low, high = high, min(high * 2, probe_ceiling)
+
+    # low 附近存在、high 附近不存在
+    while high - low > probe_window:
+        middle = (low + high) // 2
+        if await exists_near(ctx, middle):
+            low = middle
         else:
-            print(f"圖片不存在，跳過: {filename}")
-    except requests.RequestException as e:
-        print(f"下載失敗，跳過: {filename}，錯誤訊息: {e}")
+            high = middle
 
+    return high + probe_window - 1
 
-# 定義主要下載邏輯
-def download_images_for_number(number):
-    # 角色和球的 URL
-    char_url = f"https://dic.xflag.com/monsterstrike/assets-update/img/monster/{number}/character.webp"
-    ball_url = f"https://dic.xflag.com/monsterstrike/assets-update/img/monster/{number}/ball.webp"
 
-    # 角色和球的檔名
-    char_filename = f"{number}.png"
-    ball_filename = f"{number}.png"
+def open_archive(folder):
+    # blob 成員與 BlobStore 使用相同的副檔名 (blobs/<sha256>.webp)
+    return IncrementalZip(f"{folder}.zip", dedup=dedup_enabled, blob_extension=blob_extension)
+
+
+def prepare_folders():
+    # 如果資料夾不存在，則建立資料夾
+    os.makedirs(char_folder, exist_ok=True)
+    os.makedirs(ball_folder, exist_ok=True)
+
+
+def open_session(limit=None):
+    connector = aiohttp.TCPConnector(limit=limit or max_concurrency, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=10)
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+def in_shard(number, shard):
+    """shard 為 (index, count)，編號依 number % count 分配。"""
+    if shard is None:
+        return True
+    index, count = shard
+    return number % count == index
+
+
+async def discover_end(start):
+    """單獨執行上限探測，供分片模式在分派前先決定範圍。"""
+    limiter = AdaptiveLimiter(initial_concurrency, min_concurrency, max_concurrency)
+    manifest = SyncManifest(manifest_path)
+    try:
+        async with open_session() as session:
+            ctx = SweepContext(session, limiter, manifest)
+            return await discover_upper_bound(ctx, start)
+    finally:
+        manifest.close()
+
+
+async def download_all(
+    start,
+    end=None,
+    shard=None,
+    manifest_file=None,
+    archive=True,
+    collect_garbage=True,
+    transcode_pool_size=None,
+    concurrency=None,
+):
+    """
+    以共用連線池 (keep-alive) 下載所有編號，並行數交給 AdaptiveLimiter 調整。
+    shard 為 (index, count) 時只處理 number % count == index 的編號。
+    concurrency 為 (起始, 下限, 上限)，預設使用模組設定；多行程時由父行程分配。
+    """
+    prepare_folders()
+    initial, minimum, maximum = concurrency or (
+        initial_concurrency,
+        min_concurrency,
+        max_concurrency,
+    )
+    limiter = AdaptiveLimiter(initial, minimum, maximum)
+    manifest = SyncManifest(manifest_file or manifest_path)
+    frontier = manifest.max_known_number()
+
+    archives = {}
+    if archive and stream_to_zip:
+        for kind, folder in (("character", char_folder), ("ball", ball_folder)):
+            incremental = open_archive(folder)
+            # 補上資料夾中已存在但尚未收錄的檔案 (第一次啟用時)
+            incremental.sync_folder(folder)
+            archives[kind] = incremental
+
+    async with open_session(maximum) as session:
+        transcoder = None
+        if transcode_enabled:
+            transcoder = Transcoder(
+                manifest,
+                transcode_format,
+                thumbnail_sizes,
+                transcode_pool_size or transcode_workers,
+            )
+        blobs = BlobStore(blob_folder) if dedup_enabled else None
+        ctx = SweepContext(
+            session, limiter, manifest, archives, transcoder, blobs, frontier
+        )
+        try:
+            if end is None:
+                end = await discover_upper_bound(ctx, start)
+                print(f"探測到的編號上限: {end}")
+
+            # 跳過負向快取中仍在 TTL 內的編號與種類 (已知範圍以外的編號一律重新請求)
+            missing = {
+                key
+                for key in manifest.missing_since(missing_ttl)
+                if key[0] <= frontier
+            }
+            queue = asyncio.Queue()
+            skipped = 0
+            for number in range(start, end + 1):
+                if not in_shard(number, shard):
+                    continue
+                kinds = tuple(
+                    kind
+                    for kind in ("character", "ball")
+                    if (number, kind) not in missing
+                )
+                skipped += 2 - len(kinds)
+                if kinds:
+                    queue.put_nowait((number, kinds))
+            print(f"負向快取略過 {skipped} 個請求")
+
+            async def worker():
+                while True:
+                    try:
+                        number, kinds = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    await download_images_for_number(ctx, number, kinds)
+
+            # 每個編號同時下載角色與球，worker 數取上限的一半即可填滿並行額度
+            workers = max(1, maximum // 2)
+            await asyncio.gather(*(worker() for _ in range(workers)))
+
+            if transcoder is not None:
+                await transcoder.drain()
+                print(
+                    f"轉檔完成: {transcoder.done} 個，"
+                    f"來源未變更略過: {transcoder.skipped} 個"
+                )
+
+            if blobs is not None and collect_garbage:
+                manifest.flush()
+                report_dedup(blobs, manifest)
+        finally:
+            manifest.close()
+            for kind, incremental in archives.items():
+                incremental.close()
+                print(
+                    f"已更新壓縮檔: {incremental.zip_path} "
+                    f"(新增 {incremental.added} 個檔案)"
+                )
+
+    return limiter
 
-    # 下載角色和球的圖片
-    download_image(char_url, char_folder, char_filename)
-    download_image(ball_url, ball_folder, ball_filename)
+
+def report_dedup(blobs, manifest):
+    removed = blobs.collect_garbage(manifest.live_digests())
+    assets, unique = manifest.dedup_stats()
+    print(
+        f"去重: {assets} 個資產共 {unique} 份不重複內容，"
+        f"本次重複略過 {blobs.deduped} 份，清除未參照 blob {removed} 個"
+    )
 
 
 # 壓縮資料夾的函式 (覆蓋已存在的 ZIP 檔)
@@ -61,21 +572,191 @@ def zip_folder(folder_path, zip_name):
     if os.path.exists(zip_path):
         os.remove(zip_path)
 
-    shutil.make_archive(zip_name, "zip", folder_path)
+    # 下載失敗留下的 .part 與續傳驗證資訊不打包 (shutil.make_archive 無法排除)
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for root, _, files in os.walk(folder_path):
+            for name in sorted(files):
+                if name.endswith(temporary_suffixes):
+                    continue
+                file_path = os.path.join(root, name)
+                archive.write(file_path, os.path.relpath(file_path, folder_path))
     print(f"已壓縮: {zip_name}.zip")
 
 
-start_time = time.time()
-# 使用多執行緒來並行下載圖片 根據網路和電腦性能來調整max_workers
-with ThreadPoolExecutor(max_workers=25) as executor:
-    executor.map(download_images_for_number, range(start_number, end_number + 1))
+def shard_manifest_path(index, count):
+    return os.path.join(
+        os.path.dirname(manifest_path), f"manifest.shard-{index}-of-{count}.db"
+    )
+
+
+def split_concurrency(processes):
+    """把單一的並行額度平分給各行程，總和不超過單行程時的起始值與上限。"""
+    return (
+        max(1, initial_concurrency // processes),
+        max(1, min_concurrency // processes),
+        max(1, max_concurrency // processes),
+    )
+
+
+def run_shard(start, end, shard, pool_size, concurrency):
+    """
+    子行程進入點：使用父行程預先複製好的分片同步紀錄下載。
+    ZIP 與 blob 清理由父行程在合併後統一處理，避免多個行程同時寫入。
+    """
+    shard_path = shard_manifest_path(*shard)
+    limiter = asyncio.run(
+        download_all(
+            start,
+            end,
+            shard=shard,
+            manifest_file=shard_path,
+            archive=False,
+            collect_garbage=False,
+            transcode_pool_size=pool_size,
+            concurrency=concurrency,
+        )
+    )
+    return shard_path, limiter.limit, limiter.peak_limit
+
+
+def merge_manifests(paths, target=None):
+    """把各分片 (或其他主機) 的同步紀錄合併進 target，以較新的檢查時間為準。"""
+    manifest = SyncManifest(target or manifest_path)
+    try:
+        for path in paths:
+            manifest.merge_from(path)
+            print(f"已合併同步紀錄: {path}")
+    finally:
+        manifest.close()
+
+
+def finish_archives(changed_since=None):
+    """
+    合併後補齊 ZIP (只加入新增或變更的檔案)。
+    changed_since 之後寫入的檔案以 CRC 比對 (大小相同不代表內容未變)；
+    去重模式則直接以同步紀錄中的 sha256 比對 ZIP 的對照表。
+    """
+    if stream_to_zip:
+        digests = {"character": None, "ball": None}
+        if dedup_enabled:
+            manifest = SyncManifest(manifest_path)
+            for kind in digests:
+                digests[kind] = {
+                    f"{number}.png": digest
+                    for number, digest in manifest.digests(kind).items()
+                }
+            manifest.close()
+        for kind, folder in (("character", char_folder), ("ball", ball_folder)):
+            incremental = open_archive(folder)
+            incremental.sync_folder(folder, changed_since, digests[kind])
+            incremental.close()
+            print(f"已更新壓縮檔: {incremental.zip_path} (新增 {incremental.added} 個檔案)")
+    else:
+        zip_folder(char_folder, os.path.join(os.path.dirname(char_folder), "downloaded_Char"))
+        zip_folder(ball_folder, os.path.join(os.path.dirname(ball_folder), "downloaded_Ball"))
+
+
+def run(start=start_number, end=end_number, shard=None, processes=process_count):
+    """
+    下載 start..end (end 為 None 時自動探測) 的圖片。
+    shard 為 (index, count) 時只負責其中一份，供多台主機分工；
+    processes > 1 時再把這一份拆給多個行程，完成後合併同步紀錄。
+    """
+    prepare_folders()
+    start_time = time.time()
+
+    if processes <= 1:
+        limiter = asyncio.run(download_all(start, end, shard=shard))
+        if not stream_to_zip:
+            finish_archives(start_time)
+        summary = f"最終並行數: {limiter.limit}，最高並行數: {limiter.peak_limit}"
+    else:
+        if end is None:
+            end = asyncio.run(discover_end(start))
+            print(f"探測到的編號上限: {end}")
 
-end_time = time.time()
-elapsed_time = end_time - start_time
+        # 主機分片 i/n 再拆成 p 個行程：全域分片 i + n*j / n*p
+        host_index, host_count = shard or (0, 1)
+        total = host_count * processes
+        shards = [(host_index + host_count * j, total) for j in range(processes)]
+        pool_size = max(1, (transcode_workers or os.cpu_count()) // processes)
+        # 各行程各自執行 AIMD，額度必須平分，否則總並行數會是單行程的 p 倍
+        concurrency = split_concurrency(processes)
 
-print(f"圖片下載完成。 耗時: {elapsed_time:.2f} 秒")
+        # 分片紀錄從主要紀錄複製，才能沿用 ETag 送條件式請求；
+        # 已存在的分片紀錄代表上次中斷，直接沿用以保留進度
+        main_manifest = SyncManifest(manifest_path)
+        for s in shards:
+            if not os.path.exists(shard_manifest_path(*s)):
+                main_manifest.backup_to(shard_manifest_path(*s))
+        main_manifest.close()
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            futures = [
+                executor.submit(run_shard, start, end, s, pool_size, concurrency)
+                for s in shards
+            ]
+            results = [future.result() for future in futures]
+
+        merge_manifests([path for path, _, _ in results])
+        for path, _, _ in results:
+            os.remove(path)
+        finish_archives(start_time)
+        if dedup_enabled:
+            manifest = SyncManifest(manifest_path)
+            report_dedup(BlobStore(blob_folder), manifest)
+            manifest.close()
+        summary = "各行程最高並行數: " + ", ".join(
+            str(peak) for _, _, peak in results
+        )
+
+    elapsed_time = time.time() - start_time
+    print(f"圖片下載完成。 耗時: {elapsed_time:.2f} 秒，{summary}")
+
+
+def parse_shard(value):
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError("格式應為 i/n，例如 0/4")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError("需滿足 0 <= i < n")
+    return index, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="下載怪物彈珠角色與球的圖片")
+    parser.add_argument("--start", type=int, default=start_number)
+    parser.add_argument(
+        "--end", type=int, default=end_number, help="省略時自動探測編號上限"
+    )
+    parser.add_argument(
+        "--shard", type=parse_shard, help="只處理第 i 份 (共 n 份)，例如 0/4"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=process_count,
+        help="本機行程數 (並行額度會平分給各行程)，預設為 CPU 核心數；1 代表不分行程",
+    )
+    parser.add_argument(
+        "--merge",
+        nargs="+",
+        metavar="DB",
+        help="只合併其他主機的 manifest.db 到本機同步紀錄，不下載",
+    )
+    args = parser.parse_args(argv)
+
+    if args.merge:
+        merge_manifests(args.merge)
+        return
+
+    try:
+        run(args.start, args.end, args.shard, args.processes)
+    except ProbeError as e:
+        parser.exit(1, f"{e}\n")
 
-zip_folder(char_folder, os.path.join(os.path.dirname(char_folder), "downloaded_Char"))
-zip_folder(ball_folder, os.path.join(os.path.dirname(ball_folder), "downloaded_Ball"))
 
-print("壓縮完成。")
+# 轉檔與分片使用行程池，必須避免子行程 import 時重新執行下載
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import sqlite3
+import time
+
+
+class SyncManifest:
+    """
+    記錄每個怪獸編號與圖片種類 (character / ball) 的 ETag、Last-Modified、大小與雜湊，
+    讓重新執行時可以送出條件式請求 (If-None-Match / If-Modified-Since)。
+    """
+
+    def __init__(self, db_path, commit_every=200):
+        self.db_path = db_path
+        self.commit_every = commit_every
+        self._pending = 0
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS assets (
+                number INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (number, kind)
+            )
+            """
+        )
+        # 負向快取：已確認不存在的編號，超過 TTL 後才會重新詢問
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS missing (
+                number INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                PRIMARY KEY (number, kind)
+            )
+            """
+        )
+        # 轉檔紀錄：來源雜湊與轉檔設定都相同時不需重做
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS transcodes (
+                number INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                source_sha256 TEXT NOT NULL,
+                settings TEXT NOT NULL,
+                transcoded_at REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (number, kind)
+            )
+            """
+        )
+        # 舊版紀錄沒有轉檔時間，補上欄位 (舊資料視為最舊)
+        if "transcoded_at" not in self._columns("main", "transcodes"):
+            self.conn.execute(
+                "ALTER TABLE transcodes ADD COLUMN transcoded_at REAL NOT NULL DEFAULT 0"
+            )
+        self.conn.commit()
+
+    def _columns(self, schema, table):
+        return {
+            row[1] for row in self.conn.execute(f"PRAGMA {schema}.table_info({table})")
+        }
+
+    def get(self, number, kind):
+        row = self.conn.execute(
+            "SELECT etag, last_modified, size, sha256 FROM assets "
+            "WHERE number = ? AND kind = ?",
+            (number, kind),
+        ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, size, sha256 = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": size,
+            "sha256": sha256,
+        }
+
+    def conditional_headers(self, number, kind):
+        """依已記錄的驗證資訊產生條件式請求標頭。"""
+        entry = self.get(number, kind)
+        headers = {}
+        if entry is None:
+            return headers
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, number, kind, etag, last_modified, size, sha256):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO assets "
+            "(number, kind, etag, last_modified, size, sha256, checked_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (number, kind, etag, last_modified, size, sha256, time.time()),
+        )
+        self.conn.execute(
+            "DELETE FROM missing WHERE number = ? AND kind = ?", (number, kind)
+        )
+        self._maybe_commit()
+
+    def touch(self, number, kind):
+        """304 時只更新檢查時間。"""
+        self.conn.execute(
+            "UPDATE assets SET checked_at = ? WHERE number = ? AND kind = ?",
+            (time.time(), number, kind),
+        )
+        self._maybe_commit()
+
+    def mark_missing(self, number, kind):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO missing (number, kind, checked_at) VALUES (?, ?, ?)",
+            (number, kind, time.time()),
+        )
+        self._maybe_commit()
+
+    def missing_since(self, ttl):
+        """回傳 TTL 內確認不存在的 (number, kind) 集合。"""
+        rows = self.conn.execute(
+            "SELECT number, kind FROM missing WHERE checked_at >= ?",
+            (time.time() - ttl,),
+        )
+        return set(rows)
+
+    def transcoded(self, number, kind):
+        """回傳 (來源雜湊, 設定)，尚未轉檔時回傳 None。"""
+        return self.conn.execute(
+            "SELECT source_sha256, settings FROM transcodes "
+            "WHERE number = ? AND kind = ?",
+            (number, kind),
+        ).fetchone()
+
+    def record_transcode(self, number, kind, source_sha256, settings):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO transcodes "
+            "(number, kind, source_sha256, settings, transcoded_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (number, kind, source_sha256, settings, time.time()),
+        )
+        self._maybe_commit()
+
+    def digests(self, kind):
+        """回傳 {編號: sha256}。"""
+        return dict(
+            self.conn.execute(
+                "SELECT number, sha256 FROM assets WHERE kind = ?", (kind,)
+            )
+        )
+
+    def live_digests(self):
+        return {row[0] for row in self.conn.execute("SELECT sha256 FROM assets")}
+
+    def dedup_stats(self):
+        """回傳 (資產數, 不重複內容數)。"""
+        return self.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT sha256) FROM assets"
+        ).fetchone()
+
+    def max_known_number(self):
+        row = self.conn.execute("SELECT MAX(number) FROM assets").fetchone()
+        return row[0] or 0
+
+    def _maybe_commit(self):
+        # 批次提交，避免每張圖片都觸發一次 fsync
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.conn.commit()
+            self._pending = 0
+
+    def backup_to(self, path):
+        self.conn.commit()
+        target = sqlite3.connect(path)
+        with target:
+            self.conn.backup(target)
+        target.close()
+
+    def merge_from(self, path):
+        """
+        合併另一份同步紀錄 (分片或其他主機)，同一筆以較新的 checked_at 為準。
+        """
+        self.conn.commit()
+        self.conn.execute("ATTACH DATABASE ? AS other", (path,))
+        try:
+            with self.conn:
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO assets
+                    SELECT o.* FROM other.assets o
+                    LEFT JOIN assets a ON a.number = o.number AND a.kind = o.kind
+                    WHERE a.number IS NULL OR o.checked_at > a.checked_at
+                    """
+                )
+                self.conn.execute(
+                    """
+                    INSERT OR REPLACE INTO missing
+                    SELECT o.* FROM other.missing o
+                    LEFT JOIN missing m ON m.number = o.number AND m.kind = o.kind
+                    WHERE m.number IS NULL OR o.checked_at > m.checked_at
+                    """
+                )
+                # 之後又下載成功的編號不應留在負向快取
+                self.conn.execute(
+                    """
+                    DELETE FROM missing WHERE EXISTS (
+                        SELECT 1 FROM assets a
+                        WHERE a.number = missing.number AND a.kind = missing.kind
+                        AND a.checked_at >= missing.checked_at
+                    )
+                    """
+                )
+                # 分片紀錄是主要紀錄的完整複本，只合併來源雜湊與合併後資產一致、
+                # 且比現有紀錄新的轉檔結果，避免舊資料覆蓋其他分片剛轉好的紀錄
+                if "transcoded_at" in self._columns("other", "transcodes"):
+                    transcoded_at = "o.transcoded_at"
+                else:
+                    transcoded_at = "0"
+                self.conn.execute(
+                    f"""
+                    INSERT OR REPLACE INTO transcodes
+                    (number, kind, source_sha256, settings, transcoded_at)
+                    SELECT o.number, o.kind, o.source_sha256, o.settings, {transcoded_at}
+                    FROM other.transcodes o
+                    JOIN assets a ON a.number = o.number AND a.kind = o.kind
+                    LEFT JOIN transcodes t ON t.number = o.number AND t.kind = o.kind
+                    WHERE o.source_sha256 = a.sha256
+                    AND (
+                        t.number IS NULL
+                        OR t.source_sha256 != a.sha256
+                        OR {transcoded_at} > t.transcoded_at
+                    )
+                    """
+                )
+        finally:
+            self.conn.execute("DETACH DATABASE other")
+
+    def flush(self):
+        self.conn.commit()
+        self._pending = 0
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
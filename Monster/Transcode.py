@@ -0,0 +1,96 @@
+import os
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+# 輸出格式對應的副檔名與 Pillow 參數
+format_options = {
+    "png": ("png", {"format": "PNG", "optimize": False}),
+    "webp": ("webp", {"format": "WEBP", "lossless": True}),
+}
+
+
+def transcode_file(source_path, output_dir, stem, output_format, sizes):
+    """
+    在子行程中執行：解碼來源圖片，輸出正確格式的原尺寸檔與各尺寸縮圖。
+    縮圖放在 output_dir/<尺寸>/ 底下。
+    """
+    extension, options = format_options[output_format]
+    with Image.open(source_path) as image:
+        image.load()
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+
+        os.makedirs(output_dir, exist_ok=True)
+        save_atomic(image, os.path.join(output_dir, f"{stem}.{extension}"), options)
+
+        for size in sizes:
+            thumb_dir = os.path.join(output_dir, str(size))
+            os.makedirs(thumb_dir, exist_ok=True)
+            thumb = image.copy()
+            thumb.thumbnail((size, size), Image.LANCZOS)
+            save_atomic(thumb, os.path.join(thumb_dir, f"{stem}.{extension}"), options)
+    return stem
+
+
+def save_atomic(image, path, options):
+    temp_path = f"{path}.tmp"
+    image.save(temp_path, **options)
+    os.replace(temp_path, path)
+
+
+class Transcoder:
+    """
+    與下載同時進行的轉檔階段：CPU 密集的解碼 / 編碼丟給行程池，
+    來源雜湊與設定都沒變的圖片直接略過。
+    """
+
+    def __init__(self, manifest, output_format="png", sizes=(), workers=None):
+        self.manifest = manifest
+        self.output_format = output_format
+        self.sizes = tuple(sizes)
+        # 設定改變時 (格式或縮圖尺寸) 需要重新轉檔
+        self.settings = f"{output_format}:{','.join(map(str, self.sizes))}"
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+        self.pending = set()
+        self.done = 0
+        self.skipped = 0
+
+    def submit(self, number, kind, source_path, digest, output_dir):
+        extension = format_options[self.output_format][0]
+        output_path = os.path.join(output_dir, f"{number}.{extension}")
+        if self.manifest.transcoded(number, kind) == (
+            digest,
+            self.settings,
+        ) and os.path.exists(output_path):
+            self.skipped += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self.pool,
+            transcode_file,
+            source_path,
+            output_dir,
+            str(number),
+            self.output_format,
+            self.sizes,
+        )
+        task = asyncio.ensure_future(self._finish(future, number, kind, digest))
+        self.pending.add(task)
+        task.add_done_callback(self.pending.discard)
+
+    async def _finish(self, future, number, kind, digest):
+        try:
+            await future
+        except Exception as e:
+            print(f"轉檔失敗: {kind} {number}，錯誤訊息: {e}")
+            return
+        self.manifest.record_transcode(number, kind, digest, self.settings)
+        self.done += 1
+
+    async def drain(self):
+        """等待所有轉檔完成並關閉行程池。"""
+        while self.pending:
+            await asyncio.gather(*list(self.pending))
+        self.pool.shutdown()
@@ -1,14 +1,15 @@
 import os
-import time
+import sys
 import base64
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 import requests
 from concurrent.futures import ThreadPoolExecutor
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.DriverPool import get_default_pool
+from Common.PageReady import wait_for_page
+
 
 def save_image(img_url, save_dir, index, url):
     """
@@ -48,43 +49,50 @@ def save_image(img_url, save_dir, index, url):
             print(f"下載失敗: {img_url}, 错误: {e}")
 
 
-def download_images_with_selenium(url, save_dir="downloaded_images"):
+def download_images_with_selenium(
+    url, save_dir="downloaded_images", pool=None, ready_selector="img"
+):
     """
     使用 Selenium從動態網頁下載所有 <img> 標籤的圖片，包括處理 data: URL 的圖片.
 
     :param url: 網頁的 URL
     :param save_dir: 圖片保存的目录
+    :param pool: 借用 WebDriver 的 DriverPool，預設使用行程內共用的池
+    :param ready_selector: 解析前要等待出現的 CSS 選擇器 (目標頁面的圖片容器)
     """
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # 無界面模式
-    chrome_options.add_argument("--disable-gpu")  # 禁用 GPU 加速
-    chrome_options.add_argument("--no-sandbox")
-    driver = webdriver.Chrome(options=chrome_options)
+    pool = pool or get_default_pool()
 
-    try:
+    # 只在取得網頁源代碼時借用瀏覽器，下載圖片時就先歸還給池
+    with pool.driver() as driver:
         driver.get(url)
         print(f"等待 JavaScript 加载完成...")
-        time.sleep(5)  # 等待 JavaScript 加载完成
-
+        # 目標元素出現且圖片數量與 DOM 都靜止才取內容，最多等待 15 秒
+        if not wait_for_page(
+            driver,
+            element=(By.CSS_SELECTOR, ready_selector),
+            images=True,
+            network_idle=True,
+            dom_quiet=True,
+            timeout=15,
+        ):
+            print("頁面在時限內未完全載入，使用目前內容")
         html = driver.page_source
-        soup = BeautifulSoup(html, "html.parser")
-        img_tags = soup.find_all("img")
-        os.makedirs(save_dir, exist_ok=True)
-        print(f"找到 {len(img_tags)} 張圖片，開始下載...")
 
-        # 使用 ThreadPoolExecutor 進行多執行緒下載
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            for index, img_tag in enumerate(img_tags):
-                img_url = (
-                    img_tag.get("src")
-                    or img_tag.get("data-src")
-                    or img_tag.get("data-original")
-                )
-                if img_url:
-                    executor.submit(save_image, img_url, save_dir, index, url)
+    soup = BeautifulSoup(html, "html.parser")
+    img_tags = soup.find_all("img")
+    os.makedirs(save_dir, exist_ok=True)
+    print(f"找到 {len(img_tags)} 張圖片，開始下載...")
 
-    finally:
-        driver.quit()
+    # 使用 ThreadPoolExecutor 進行多執行緒下載
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        for index, img_tag in enumerate(img_tags):
+            img_url = (
+                img_tag.get("src")
+                or img_tag.get("data-src")
+                or img_tag.get("data-original")
+            )
+            if img_url:
+                executor.submit(save_image, img_url, save_dir, index, url)
 
 
 if __name__ == "__main__":
@@ -49,5 +49,6 @@ def download_images(url):
 
 
 # 使用範例
-url = input("請輸入網址: ")
-download_images(url)
+if __name__ == "__main__":
+    url = input("請輸入網址: ")
+    download_images(url)
@@ -1,24 +1,13 @@
 import os
-import time
+import sys
 import requests
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
+from selenium.webdriver.common.by import By
 from concurrent.futures import ThreadPoolExecutor
 
-
-def init_webdriver(headless=True):
-    """init Selenium WebDriver。"""
-    chrome_options = Options()
-    if headless:
-        chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--ignore-certificate-errors")
-    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-    chrome_options.add_argument("--disable-browser-side-navigation")
-    chrome_options.add_argument("--disable-infobars")
-    chrome_options.add_argument("--no-sandbox")
-    return webdriver.Chrome(options=chrome_options)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.DriverPool import DriverPool
+from Common.PageReady import wait_for_page
 
 
 def save_image(img_url, save_dir, index, base_url):
@@ -57,10 +46,28 @@ def save_image(img_url, save_dir, index, base_url):
         print(f"下載失敗: {img_url}, 錯誤: {e}")
 
 
-def fetch_page_source(driver, url, wait_time=5):
-    """使用 Selenium 獲取網頁源代碼，沿用同一個 WebDriver 實例。"""
+# 各類圖片解析前要等待出現的元素
+CHAR_PRO_SELECTOR = (By.CSS_SELECTOR, "img[class*='char-pro']")
+AVATAR_SELECTOR = (By.CSS_SELECTOR, "img[class*='avatar']")
+BACKGROUND_SELECTOR = (By.CSS_SELECTOR, "div[style*='background-image']")
+
+
+def fetch_page_source(driver, url, element, images=True, timeout=15):
+    """
+    使用 Selenium 獲取網頁源代碼，沿用同一個 WebDriver 實例。
+    等到解析需要的 element 出現，且 (images 為 True 時) 圖片數量與 DOM 都靜止才取內容，
+    最多等待 timeout 秒。
+    """
     driver.get(url)
-    time.sleep(wait_time)  # 等待 JavaScript 加載完成
+    if not wait_for_page(
+        driver,
+        element=element,
+        images=images,
+        network_idle=not images,
+        dom_quiet=True,
+        timeout=timeout,
+    ):
+        print(f"頁面在 {timeout} 秒內未完全載入，使用目前內容: {url}")
     return driver.page_source
 
 
@@ -88,12 +95,12 @@ def parse_background_images(soup):
     return images
 
 
-def download_images(image_list, save_dir, base_url):
+def download_images(image_list, save_dir, base_url, max_workers=10):
     """
     使用多執行緒下載圖片。
     """
     os.makedirs(save_dir, exist_ok=True)
-    with ThreadPoolExecutor(max_workers=10) as executor:
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
         for img_url, index in image_list:
             executor.submit(save_image, img_url, save_dir, index, base_url)
 
@@ -103,7 +110,7 @@ def download_avatar_images(driver, base_url, save_dir="downloaded_images/avatar"
     下載 class 包含 "avatar" 的圖片。
     """
     url = base_url.format(worldIndex=1)
-    html = fetch_page_source(driver, url)
+    html = fetch_page_source(driver, url, AVATAR_SELECTOR)
     soup = BeautifulSoup(html, "html.parser")
     avatar_images = parse_images(soup, css_class="avatar")
     odd_avatar_images = [
@@ -128,7 +135,7 @@ def download_char_pro_images(
     for world_index in range(1, max_world + 1):
 
         url = base_url.format(worldIndex=world_index)
-        html = fetch_page_source(driver, url)
+        html = fetch_page_source(driver, url, CHAR_PRO_SELECTOR)
         soup = BeautifulSoup(html, "html.parser")
         attribute_images = parse_images(soup, css_class="char-pro")
 
@@ -171,7 +178,8 @@ def download_world_images(driver, base_url, save_dir="downloaded_images", max_wo
         os.makedirs(world_save_dir, exist_ok=True)
 
         url = base_url.format(worldIndex=world_index)
-        html = fetch_page_source(driver, url)
+        # 背景圖片不在 document.images 中，改以網路請求靜止判斷
+        html = fetch_page_source(driver, url, BACKGROUND_SELECTOR, images=False)
         soup = BeautifulSoup(html, "html.parser")
 
         background_images = parse_background_images(soup)
@@ -194,11 +202,12 @@ if __name__ == "__main__":
         "https://hsr.hoyoverse.com/zh-tw/character?worldIndex={worldIndex}&charIndex=1"
     )
 
-    driver = init_webdriver()
+    pool = DriverPool(size=1)
 
     try:
-        download_char_pro_images(driver, base_url)
-        download_avatar_images(driver, base_url)
-        download_world_images(driver, base_url)
+        with pool.driver() as driver:
+            download_char_pro_images(driver, base_url)
+            download_avatar_images(driver, base_url)
+            download_world_images(driver, base_url)
     finally:
-        driver.quit()  # 程式執行結束後關閉 WebDriver
+        pool.close()  # 程式執行結束後關閉 WebDriver
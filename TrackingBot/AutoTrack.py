@@ -1,20 +1,32 @@
 import discord
 from discord.ext import commands
-import json
 import os
+import sys
 from dotenv import load_dotenv
 import time
-import pytesseract
-import cv2
-import numpy as np
 from PIL import Image
-from selenium import webdriver
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 import asyncio
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Common.DriverPool import DriverPool
+from Common.PageReady import wait_for_page
+from PackagePoller import PackagePoller
+from PackageStore import PackageStore
+from CaptchaSolver import CaptchaSolver
+from HttpTracker import CaptchaRejectedError, HttpTracker, TrackingPageError
+from TrackingJobs import (
+    FAILED_KEYWORDS,
+    QueueFullError,
+    ResultCache,
+    TrackingJobQueue,
+    render_progress,
+)
 
 # 設定 Discord Bot
 load_dotenv()
@@ -24,107 +36,244 @@ DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 intents = discord.Intents.default()
 bot = commands.Bot(command_prefix="!", intents=intents)
 
-# 存儲查詢的包裹（使用 JSON 檔案）
-PACKAGE_FILE = os.path.join(os.path.dirname(__file__), "pack.json")
+# 查詢方式：auto 先用 HTTP、失敗再用瀏覽器；http / selenium 只使用其中一種
+TRACKING_BACKEND = os.getenv("TRACKING_BACKEND", "auto")
 
+# headless Chrome 池，查詢時借用，不再每次冷啟動瀏覽器
+# 只用 Selenium 時預先啟動；auto 模式下瀏覽器只是備援，需要時才啟動
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", 2))
+driver_pool = DriverPool(size=DRIVER_POOL_SIZE, prelaunch=TRACKING_BACKEND == "selenium")
 
-def load_packages():
-    if os.path.exists(PACKAGE_FILE):
-        with open(PACKAGE_FILE, "r") as f:
-            return json.load(f)
-    return {}
+# 存儲查詢的包裹（SQLite，每位使用者可登記多個單號）
+PACKAGE_DB = os.getenv("PACKAGE_DB", os.path.join(os.path.dirname(__file__), "packages.db"))
+MAX_PACKAGES_PER_USER = int(os.getenv("MAX_PACKAGES_PER_USER", 10))
+package_store = PackageStore(PACKAGE_DB)
+# 舊版的 pack.json 在第一次啟動時匯入
+package_store.import_json(os.path.join(os.path.dirname(__file__), "pack.json"))
 
 
-def save_packages(packages):
-    with open(PACKAGE_FILE, "w") as f:
-        json.dump(packages, f, indent=4)
-
-
-# 設定包裹追蹤
+# 登記包裹追蹤
 @bot.command()
 async def add(ctx, tracking_number: str):
-    packages = load_packages()
-    packages[str(ctx.author.id)] = tracking_number  # 直接覆蓋舊的單號
-    save_packages(packages)
-    await ctx.send(f"已設定您的查詢單號: {tracking_number}")
+    if package_store.count(ctx.author.id) >= MAX_PACKAGES_PER_USER:
+        await ctx.send(f"最多只能登記 {MAX_PACKAGES_PER_USER} 個單號，請先用 `!remove 單號` 移除。")
+        return
+    if package_store.add(ctx.author.id, tracking_number):
+        await ctx.send(f"已新增您的查詢單號: {tracking_number}")
+    else:
+        await ctx.send(f"單號 {tracking_number} 已經登記過了。")
 
 
-# 快速查詢已設定的包裹
+# 移除登記的包裹
 @bot.command()
-async def track(ctx):
-    packages = load_packages()
-    tracking_number = packages.get(str(ctx.author.id))
-
-    if not tracking_number:
+async def remove(ctx, tracking_number: str):
+    if package_store.remove(ctx.author.id, tracking_number):
+        await ctx.send(f"已移除查詢單號: {tracking_number}")
+    else:
+        await ctx.send(f"您沒有登記單號 {tracking_number}。")
+
+
+# 列出登記的包裹與最後查到的狀態
+@bot.command(name="list")
+async def list_packages(ctx):
+    packages = package_store.packages_for(ctx.author.id)
+    if not packages:
         await ctx.send("您尚未設定查詢單號，請使用 `!add 單號` 來設定。")
         return
 
-    message = await ctx.send("查詢中: `[----------] 0%`")
-    status = get_tracking_status(tracking_number)
+    lines = []
+    for tracking_number, last_status, last_checked in packages:
+        if last_checked:
+            checked = time.strftime("%m/%d %H:%M", time.localtime(last_checked))
+            lines.append(f"{tracking_number}: {last_status} ({checked})")
+        else:
+            lines.append(f"{tracking_number}: 尚未查詢")
+    await ctx.send("\n".join(lines))
 
-    for i in range(1, 11):  # 模擬進度條 (10步)
-        progress_bar = "█" * i + "-" * (10 - i)
-        await message.edit(content=f"查詢中: `[{progress_bar}] {i * 10}%`")
-        await asyncio.sleep(0.5)  # 模擬查詢時間
 
-    # 真正執行查詢
+# 快速查詢所有已登記的包裹
+@bot.command()
+async def track(ctx):
+    packages = package_store.packages_for(ctx.author.id)
 
-    await message.edit(content=f"查詢結果: {status}")
+    if not packages:
+        await ctx.send("您尚未設定查詢單號，請使用 `!add 單號` 來設定。")
+        return
+
+    for tracking_number, _, _ in packages:
+        await enqueue_tracking(ctx, tracking_number)
 
 
 # 手動輸入單號查詢
 @bot.command()
 async def check(ctx, tracking_number: str):
-    message = await ctx.send("查詢中: `[----------] 0%`")
+    await enqueue_tracking(ctx, tracking_number)
 
-    for i in range(1, 11):  # 模擬進度條 (10步)
-        progress_bar = "█" * i + "-" * (10 - i)
-        await message.edit(content=f"查詢中: `[{progress_bar}] {i * 10}%`")
-        await asyncio.sleep(0.5)  # 模擬查詢時間
 
-    # 真正執行查詢
-    status = get_tracking_status(tracking_number)
-    await message.edit(content=f"查詢結果: {status}")
+# 保留進度更新任務的參照，避免執行中被回收
+progress_tasks = set()
 
 
-def get_tracking_status(tracking_number):
+async def enqueue_tracking(ctx, tracking_number):
+    """把查詢放進佇列後立即返回，進度由背景任務更新同一則訊息。"""
+    try:
+        job = job_queue.submit(tracking_number)
+    except QueueFullError as e:
+        await ctx.send(str(e))
+        return
 
-    # 設定 Selenium WebDriver
+    if job.cached:
+        await ctx.send(f"{job.tracking_number} 查詢結果: {job.future.result()}")
+        return
 
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")
-    driver = webdriver.Chrome(options=chrome_options)
+    message = await ctx.send(render_progress("queued"))
+    task = asyncio.create_task(follow_tracking_job(message, job))
+    progress_tasks.add(task)
+    task.add_done_callback(progress_tasks.discard)
 
-    driver.get("https://eservice.7-11.com.tw/e-tracking/search.aspx")
-    time.sleep(2)
 
-    tracking_input = driver.find_element(By.ID, "txtProductNum")
-    tracking_input.send_keys(tracking_number)
+async def follow_tracking_job(message, job):
+    # 依照查詢實際走到的步驟更新進度條
+    async for stage in job.stages():
+        if stage == "queued":
+            continue
+        try:
+            await message.edit(content=render_progress(stage))
+        except discord.HTTPException:
+            pass  # 進度更新失敗不影響查詢結果
 
-    vcode_img = driver.find_element(By.ID, "ImgVCode")
-    WebDriverWait(driver, 10).until(lambda d: vcode_img.get_attribute("src") != "")
+    try:
+        status = await job.future
+    except Exception as e:
+        print(f"查詢 {job.tracking_number} 失敗: {e}")
+        status = "查詢失敗，請稍後再試"
+    else:
+        # 已登記的單號同步更新最後狀態，!list 才會顯示剛查到的結果
+        if status and not any(keyword in status for keyword in FAILED_KEYWORDS):
+            package_store.record_status(job.tracking_number, status)
+    await message.edit(content=f"{job.tracking_number} 查詢結果: {status}")
+
+
+def get_tracking_status(tracking_number, report=None):
+    if report is None:
+        report = lambda stage: None
+
+    # 先走不開瀏覽器的 HTTP 流程；只有查詢頁改版或連線錯誤時才改用 Selenium，
+    # 驗證碼答錯已在 HTTP 流程中換圖重試，查無資料也不需要再開瀏覽器
+    if TRACKING_BACKEND in ("auto", "http"):
+        try:
+            return http_tracker.lookup(tracking_number, report) or "查詢失敗或查無資料"
+        except CaptchaRejectedError:
+            return "查詢失敗，驗證碼多次辨識錯誤，請稍後再試"
+        except (TrackingPageError, requests.RequestException) as e:
+            if TRACKING_BACKEND == "http":
+                raise
+            print(f"HTTP 查詢 {tracking_number} 失敗，改用瀏覽器: {e}")
+
+    # 從池中借用 Selenium WebDriver，結束後自動歸還
+    with driver_pool.driver() as driver:
+        report("browser")
+        return query_tracking_status(driver, tracking_number, report)
+
+
+# 查詢在背景執行緒中進行，不會卡住 Discord 事件迴圈。
+# HTTP 查詢不佔瀏覽器，同時執行數另外設定；改用 Selenium 的查詢由瀏覽器池限制同時數量
+TRACKING_WORKERS = int(
+    os.getenv("TRACKING_WORKERS", DRIVER_POOL_SIZE if TRACKING_BACKEND == "selenium" else 8)
+)
+TRACKING_QUEUE_LIMIT = int(os.getenv("TRACKING_QUEUE_LIMIT", 20))
+# 查詢結果快取 (秒)：運送中的狀態較短，已取件 / 已退回等最終狀態較長
+TRACKING_CACHE_TTL = int(os.getenv("TRACKING_CACHE_TTL", 300))
+TRACKING_FINAL_CACHE_TTL = int(os.getenv("TRACKING_FINAL_CACHE_TTL", 6 * 3600))
+job_queue = TrackingJobQueue(
+    get_tracking_status,
+    workers=TRACKING_WORKERS,
+    max_pending=TRACKING_QUEUE_LIMIT,
+    cache=ResultCache(TRACKING_CACHE_TTL, TRACKING_FINAL_CACHE_TTL),
+)
+
+
+# 驗證碼辨識：長度不符或信心度太低就換一張重試，最多 CAPTCHA_ATTEMPTS 次
+CAPTCHA_LENGTH = int(os.getenv("CAPTCHA_LENGTH", 4))
+CAPTCHA_MIN_CONFIDENCE = float(os.getenv("CAPTCHA_MIN_CONFIDENCE", 60))
+CAPTCHA_ATTEMPTS = int(os.getenv("CAPTCHA_ATTEMPTS", 3))
+captcha_solver = CaptchaSolver(CAPTCHA_LENGTH, CAPTCHA_MIN_CONFIDENCE)
+# 設定後會保存答對的驗證碼，供 Benchmark/BenchCaptcha.py 離線調整前處理參數
+CAPTCHA_CORPUS_DIR = os.getenv("CAPTCHA_CORPUS_DIR")
+# 驗證碼被伺服器拒絕時，以 HTTP 換圖重新送出的次數
+TRACKING_SUBMIT_ATTEMPTS = int(os.getenv("TRACKING_SUBMIT_ATTEMPTS", 3))
+http_tracker = HttpTracker(
+    captcha_solver,
+    captcha_attempts=CAPTCHA_ATTEMPTS,
+    submit_attempts=TRACKING_SUBMIT_ATTEMPTS,
+    corpus_dir=CAPTCHA_CORPUS_DIR,
+)
+
+
+# 查詢頁與結果頁的載入上限 (秒)
+PAGE_TIMEOUT = float(os.getenv("PAGE_TIMEOUT", 15))
+
+
+def captcha_loaded(driver, vcode_img):
+    return driver.execute_script(
+        "return arguments[0].complete && arguments[0].naturalWidth > 0;", vcode_img
+    )
 
-    captcha_path = os.path.join(os.path.dirname(__file__), "captcha.png")
-    vcode_img.screenshot(captcha_path)
 
-    image = cv2.imread(captcha_path)
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    denoised = cv2.bilateralFilter(gray, 9, 75, 75)
-    binary = cv2.adaptiveThreshold(
-        denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY_INV, 11, 2
+def refresh_captcha(driver, vcode_img):
+    # 重新載入驗證碼圖片，伺服器會在同一個 session 中換一組新的驗證碼
+    driver.execute_script(
+        "arguments[0].src = arguments[0].src.split('?')[0] + '?' + Date.now();",
+        vcode_img,
     )
-    kernel = np.ones((2, 2), np.uint8)
-    cleaned = cv2.morphologyEx(binary, cv2.MORPH_OPEN, kernel, iterations=1)
-    processed = cv2.bitwise_not(cleaned)
 
-    custom_config = r"--oem 3 --psm 7 -c tessedit_char_whitelist=0123456789"
-    captcha_text = pytesseract.image_to_string(processed, config=custom_config).strip()
+
+def read_captcha(driver, vcode_img):
+    best = None
+    for attempt in range(CAPTCHA_ATTEMPTS):
+        if attempt:
+            refresh_captcha(driver, vcode_img)
+        WebDriverWait(driver, 10).until(lambda d: captcha_loaded(d, vcode_img))
+
+        # 截圖直接取得 PNG bytes，整個流程都在記憶體中完成
+        text, confidence, ok = captcha_solver.solve(vcode_img.screenshot_as_png)
+        if ok:
+            return text
+        print(f"驗證碼辨識不可信 ({text!r}, 信心度 {confidence:.0f})，重新取得驗證碼")
+        if best is None or confidence > best[1]:
+            best = (text, confidence)
+    # 重試次數用完時送出信心度最高的結果
+    return best[0]
+
+
+def query_tracking_status(driver, tracking_number, report=None):
+    if report is None:
+        report = lambda stage: None
+
+    driver.get("https://eservice.7-11.com.tw/e-tracking/search.aspx")
+    # 輸入框與驗證碼圖片出現就開始，不再固定等待
+    if not wait_for_page(driver, element=(By.ID, "ImgVCode"), timeout=PAGE_TIMEOUT):
+        raise TimeoutError("查詢頁載入逾時")
+    report("page")
+
+    tracking_input = driver.find_element(By.ID, "txtProductNum")
+    tracking_input.send_keys(tracking_number)
+
+    vcode_img = driver.find_element(By.ID, "ImgVCode")
+    captcha_text = read_captcha(driver, vcode_img)
+    report("captcha")
 
     vcode_input = driver.find_element(By.ID, "tbChkCode")
     vcode_input.send_keys(captcha_text)
     tracking_input.send_keys(Keys.RETURN)
+    report("submitted")
 
-    time.sleep(3)
+    # 送出後舊頁面的輸入框會失效，再等新頁面載入、DOM 靜止後解析結果
+    try:
+        WebDriverWait(driver, PAGE_TIMEOUT).until(EC.staleness_of(tracking_input))
+    except TimeoutException:
+        pass  # 頁面沒有整頁重新載入 (例如跳出錯誤提示)，直接檢查目前內容
+    wait_for_page(driver, dom_quiet=True, quiet=0.3, timeout=PAGE_TIMEOUT)
 
     try:
         status_element = driver.find_element(By.ID, "timeline_status")
@@ -132,10 +281,38 @@ def get_tracking_status(tracking_number):
     except Exception:
         status_text = "查詢失敗或查無資料"
 
-    driver.quit()
-    os.remove(captcha_path)
+    report("parsed")
 
     return status_text
 
 
+# 定期查詢已登記的包裹 (秒 / 每分鐘次數)，狀態改變才私訊通知
+POLL_INTERVAL = int(os.getenv("POLL_INTERVAL", 1800))
+POLL_CONCURRENCY = int(os.getenv("POLL_CONCURRENCY", 1))
+POLL_RATE_PER_MINUTE = float(os.getenv("POLL_RATE_PER_MINUTE", 6))
+poller_task = None
+
+
+async def notify_status_change(user_id, tracking_number, status):
+    user = bot.get_user(int(user_id)) or await bot.fetch_user(int(user_id))
+    await user.send(f"您的包裹 {tracking_number} 狀態更新: {status}")
+
+
+@bot.event
+async def on_ready():
+    global poller_task
+    # 斷線重連也會觸發 on_ready，只啟動一次排程
+    if poller_task is None:
+        poller = PackagePoller(
+            job_queue,
+            package_store,
+            notify_status_change,
+            interval=POLL_INTERVAL,
+            concurrency=POLL_CONCURRENCY,
+            rate_per_minute=POLL_RATE_PER_MINUTE,
+        )
+        poller_task = asyncio.create_task(poller.run())
+    print(f"Logged in as {bot.user}!")
+
+
 bot.run(DISCORD_TOKEN)
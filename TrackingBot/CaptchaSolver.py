@@ -0,0 +1,129 @@
+import io
+import threading
+
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # 沒安裝 tesserocr 時改用 pytesseract (每次辨識會啟動 tesseract 行程)
+    tesserocr = None
+
+DIGITS = "0123456789"
+
+
+def decode_image(data):
+    """驗證碼圖片 (PNG 截圖或伺服器回傳的原始圖檔) 直接在記憶體中解碼，不經過暫存檔。"""
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        # OpenCV 不支援 GIF，改用 Pillow 解碼
+        try:
+            rgb = Image.open(io.BytesIO(data)).convert("RGB")
+        except Exception:
+            raise ValueError("無法解碼驗證碼圖片")
+        image = cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+    return image
+
+
+def preprocess(
+    image,
+    bilateral=(9, 75, 75),
+    block_size=11,
+    threshold_c=2,
+    kernel_size=2,
+    open_iterations=1,
+):
+    """灰階 → 雙邊濾波去雜訊 → 自適應二值化 → 形態學開運算 → 反相成白底黑字。"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    if bilateral:
+        gray = cv2.bilateralFilter(gray, *bilateral)
+    binary = cv2.adaptiveThreshold(
+        gray,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY_INV,
+        block_size,
+        threshold_c,
+    )
+    if kernel_size and open_iterations:
+        kernel = np.ones((kernel_size, kernel_size), np.uint8)
+        binary = cv2.morphologyEx(
+            binary, cv2.MORPH_OPEN, kernel, iterations=open_iterations
+        )
+    return cv2.bitwise_not(binary)
+
+
+class OcrEngine:
+    """
+    常駐的 OCR 引擎：有 tesserocr 時每個執行緒保留一個 PyTessBaseAPI，
+    模型只載入一次；否則退回 pytesseract。recognize() 回傳 (文字, 信心度 0-100)。
+    """
+
+    def __init__(self, whitelist=DIGITS):
+        self.whitelist = whitelist
+        self._local = threading.local()
+        if tesserocr is None:
+            print(
+                "警告: 未安裝 tesserocr，改用 pytesseract，每次辨識都會啟動一個 tesseract 行程。"
+                "請執行 pip install tesserocr 以使用常駐的 OCR 引擎。"
+            )
+
+    @property
+    def backend(self):
+        return "tesserocr" if tesserocr is not None else "pytesseract"
+
+    def _api(self):
+        # PyTessBaseAPI 不是執行緒安全的，每個工作執行緒各自建立一個
+        api = getattr(self._local, "api", None)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(psm=tesserocr.PSM.SINGLE_LINE)
+            api.SetVariable("tessedit_char_whitelist", self.whitelist)
+            self._local.api = api
+        return api
+
+    def recognize(self, processed):
+        if tesserocr is not None:
+            api = self._api()
+            api.SetImage(Image.fromarray(processed))
+            return api.GetUTF8Text().strip(), float(api.MeanTextConf())
+
+        config = rf"--oem 3 --psm 7 -c tessedit_char_whitelist={self.whitelist}"
+        data = pytesseract.image_to_data(
+            processed, config=config, output_type=pytesseract.Output.DICT
+        )
+        words = [
+            (text.strip(), float(conf))
+            for text, conf in zip(data["text"], data["conf"])
+            if text.strip() and float(conf) >= 0
+        ]
+        if not words:
+            return "", 0.0
+        text = "".join(word for word, _ in words)
+        confidence = sum(conf for _, conf in words) / len(words)
+        return text, confidence
+
+
+class CaptchaSolver:
+    """
+    辨識驗證碼並判斷結果是否可信：長度不符或信心度太低時 ok 為 False，
+    呼叫端應該換一張驗證碼再試，而不是送出一定會失敗的查詢。
+    """
+
+    def __init__(self, length=4, min_confidence=60, engine=None, **preprocess_options):
+        self.length = length
+        self.min_confidence = min_confidence
+        self.engine = engine or OcrEngine()
+        self.preprocess_options = preprocess_options
+
+    def solve_image(self, image):
+        processed = preprocess(image, **self.preprocess_options)
+        text, confidence = self.engine.recognize(processed)
+        text = "".join(ch for ch in text if ch in self.engine.whitelist)
+        ok = len(text) == self.length and confidence >= self.min_confidence
+        return text, confidence, ok
+
+    def solve(self, data):
+        """回傳 (文字, 信心度, 是否可信)。"""
+        return self.solve_image(decode_image(data))
@@ -0,0 +1,182 @@
+"""
+不開瀏覽器的 7-11 貨態查詢：以 HTTP 重現表單流程。
+GET 查詢頁 → 帶上 ASP.NET 隱藏欄位 → 直接下載驗證碼圖片 → POST → 解析 timeline_status。
+
+用法 (可對本地替身伺服器測試):
+    python TrackingBot/HttpTracker.py 單號 --url http://127.0.0.1:8000/e-tracking/search.aspx
+"""
+
+import os
+import argparse
+import threading
+import time
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+SEARCH_URL = "https://eservice.7-11.com.tw/e-tracking/search.aspx"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/131.0 Safari/537.36"
+)
+
+
+# 送出後頁面出現這些訊息代表驗證碼答錯，換一張重新送出
+CAPTCHA_ERROR_KEYWORDS = ("驗證碼錯誤", "驗證碼輸入錯誤", "驗證碼不正確")
+
+
+class TrackingPageError(Exception):
+    """查詢頁的結構和預期不同 (例如改版)，呼叫端應改用 Selenium。"""
+
+
+class CaptchaRejectedError(Exception):
+    """重試次數用完，驗證碼仍然被伺服器拒絕。"""
+
+
+class HttpTracker:
+    """
+    每個工作執行緒保留一個 requests.Session，重複使用 keep-alive 連線；
+    每次查詢前清除 cookie，讓驗證碼綁定在這次查詢自己的 ASP.NET session。
+    lookup() 回傳 timeline_status；單號查無資料時回傳 None。
+    驗證碼答錯時在同一個 session 換一張重送，最多 submit_attempts 次。
+    設定 corpus_dir 時，查詢成功的驗證碼會以「答案_時間.副檔名」存下，作為離線基準測試的語料。
+    """
+
+    def __init__(
+        self,
+        solver,
+        search_url=SEARCH_URL,
+        captcha_attempts=3,
+        submit_attempts=3,
+        timeout=10,
+        corpus_dir=None,
+    ):
+        self.solver = solver
+        self.search_url = search_url
+        self.captcha_attempts = captcha_attempts
+        self.submit_attempts = submit_attempts
+        self.timeout = timeout
+        self.corpus_dir = corpus_dir
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers["User-Agent"] = USER_AGENT
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            self._local.session = session
+        return session
+
+    def _fetch_form(self, session):
+        response = session.get(self.search_url, timeout=self.timeout)
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, "html.parser")
+
+        tracking_input = soup.find(id="txtProductNum")
+        vcode_input = soup.find(id="tbChkCode")
+        vcode_img = soup.find(id="ImgVCode")
+        if tracking_input is None or vcode_input is None or vcode_img is None:
+            raise TrackingPageError("查詢頁缺少必要欄位")
+        form = tracking_input.find_parent("form") or soup
+
+        # __VIEWSTATE、__EVENTVALIDATION 等隱藏欄位要原樣送回
+        fields = {
+            field["name"]: field.get("value", "")
+            for field in form.find_all("input", type="hidden")
+            if field.get("name")
+        }
+        # 模擬按下查詢按鈕，ASP.NET 依按鈕名稱觸發對應的事件
+        button = form.find("input", type="submit")
+        if button is not None and button.get("name"):
+            fields[button["name"]] = button.get("value", "")
+
+        action = urljoin(response.url, form.get("action") or response.url)
+        captcha_url = urljoin(response.url, vcode_img["src"])
+        return action, captcha_url, fields, tracking_input["name"], vcode_input["name"]
+
+    def _read_captcha(self, session, captcha_url):
+        best = None
+        for attempt in range(self.captcha_attempts):
+            # 重新下載驗證碼時伺服器會換一組新的，加上時間戳避免快取
+            url = captcha_url
+            if attempt:
+                separator = "&" if "?" in captcha_url else "?"
+                url = f"{captcha_url}{separator}{int(time.time() * 1000)}"
+            response = session.get(url, timeout=self.timeout)
+            response.raise_for_status()
+
+            text, confidence, ok = self.solver.solve(response.content)
+            if ok:
+                return text, response
+            if best is None or confidence > best[1]:
+                best = (text, confidence, response)
+        return best[0], best[2]
+
+    def _save_sample(self, text, response):
+        # 查詢成功代表驗證碼答案正確，存成已標註的語料
+        content_type = response.headers.get("Content-Type", "")
+        ext = ".gif" if "gif" in content_type else ".jpg" if "jpeg" in content_type else ".png"
+        os.makedirs(self.corpus_dir, exist_ok=True)
+        path = os.path.join(self.corpus_dir, f"{text}_{time.time_ns()}{ext}")
+        with open(path, "wb") as f:
+            f.write(response.content)
+
+    def _captcha_rejected(self, soup):
+        message = soup.find(id="lbMsg")
+        text = message.get_text() if message is not None else ""
+        # 有些版本以 alert() 顯示錯誤訊息
+        text += "".join(script.get_text() for script in soup.find_all("script"))
+        return any(keyword in text for keyword in CAPTCHA_ERROR_KEYWORDS)
+
+    def lookup(self, tracking_number, report=None):
+        if report is None:
+            report = lambda stage: None
+
+        session = self._session()
+        session.cookies.clear()
+
+        for attempt in range(self.submit_attempts):
+            action, captcha_url, fields, tracking_name, vcode_name = self._fetch_form(
+                session
+            )
+            report("page")
+
+            captcha_text, captcha_response = self._read_captcha(session, captcha_url)
+            fields[vcode_name] = captcha_text
+            fields[tracking_name] = tracking_number
+            report("captcha")
+
+            response = session.post(
+                action, data=fields, headers={"Referer": self.search_url}, timeout=self.timeout
+            )
+            response.raise_for_status()
+            report("submitted")
+
+            soup = BeautifulSoup(response.text, "html.parser")
+            status_element = soup.find(id="timeline_status")
+            if status_element is not None:
+                report("parsed")
+                if self.corpus_dir:
+                    self._save_sample(captcha_text, captcha_response)
+                return status_element.get_text(strip=True)
+            if not self._captcha_rejected(soup):
+                return None  # 驗證碼正確但查無此單號
+            print(f"驗證碼 {captcha_text!r} 被拒絕，重新查詢 ({attempt + 1}/{self.submit_attempts})")
+
+        raise CaptchaRejectedError("驗證碼多次辨識錯誤")
+
+
+if __name__ == "__main__":
+    from CaptchaSolver import CaptchaSolver
+
+    parser = argparse.ArgumentParser(description="以 HTTP 查詢 7-11 貨態")
+    parser.add_argument("tracking_number")
+    parser.add_argument("--url", default=SEARCH_URL)
+    args = parser.parse_args()
+
+    tracker = HttpTracker(CaptchaSolver(), args.url)
+    print(tracker.lookup(args.tracking_number, report=print) or "查詢失敗或查無資料")
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+from TrackingJobs import FAILED_KEYWORDS, QueueFullError
+
+
+class RateLimiter:
+    """全域速率限制：兩次查詢的開始時間至少間隔 60 / rate_per_minute 秒。"""
+
+    def __init__(self, rate_per_minute):
+        self.spacing = 60 / rate_per_minute
+        self._next_at = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        start_at = max(now, self._next_at)
+        self._next_at = start_at + self.spacing
+        if start_at > now:
+            await asyncio.sleep(start_at - now)
+
+
+class PackagePoller:
+    """
+    定期重新查詢所有已登記的包裹：
+    查詢平均分散在整個週期內，同時受速率與並行數限制，
+    只有 timeline_status 改變時才通知追蹤該單號的使用者。
+    """
+
+    def __init__(
+        self,
+        job_queue,
+        store,
+        notify,
+        interval=1800,
+        concurrency=2,
+        rate_per_minute=10,
+    ):
+        self.job_queue = job_queue
+        self.store = store  # PackageStore，提供登記的單號並保存最後狀態
+        self.notify = notify  # async notify(user_id, 單號, 新狀態)
+        self.interval = interval
+        self._slots = asyncio.Semaphore(concurrency)
+        self._rate = RateLimiter(rate_per_minute)
+        self._tasks = set()  # 保留進行中任務的參照，避免被回收
+
+    def _watchers(self):
+        # 同一個單號只查一次，結果通知所有追蹤它的使用者
+        watchers = {}
+        for user_id, tracking_number in self.store.all_packages():
+            watchers.setdefault(tracking_number, set()).add(user_id)
+        return watchers
+
+    async def run(self):
+        while True:
+            cycle_start = time.monotonic()
+            watchers = self._watchers()
+            spacing = self.interval / max(len(watchers), 1)
+
+            for index, (tracking_number, users) in enumerate(watchers.items()):
+                # 依序排在週期中的固定時間點，避免一次湧入
+                delay = cycle_start + index * spacing - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                await self._rate.wait()
+                await self._slots.acquire()
+                task = asyncio.create_task(self._check(tracking_number, users))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+            remaining = cycle_start + self.interval - time.monotonic()
+            await asyncio.sleep(max(remaining, 0))
+
+    async def _check(self, tracking_number, users):
+        try:
+            job = self.job_queue.submit(tracking_number)
+            status = await job.future
+        except QueueFullError:
+            return  # 佇列留給使用者手動查詢，這一輪先跳過
+        except Exception as e:
+            print(f"定期查詢 {tracking_number} 失敗: {e}")
+            return
+        finally:
+            self._slots.release()
+
+        if not status or any(keyword in status for keyword in FAILED_KEYWORDS):
+            return
+        previous = self.store.record_status(tracking_number, status)
+        if previous is None or previous == status:
+            return  # 第一次查到只記錄，不通知
+
+        for user_id in users:
+            try:
+                await self.notify(user_id, tracking_number, status)
+            except Exception as e:
+                print(f"通知使用者 {user_id} 失敗: {e}")
@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import time
+
+
+class PackageStore:
+    """
+    以 SQLite 儲存使用者登記的包裹：
+    每位使用者可登記多個單號，並記錄每個單號最後查到的狀態與查詢時間。
+    每個指令只讀寫相關的幾筆資料，不再整檔讀寫 pack.json。
+    """
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        with self.conn:
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS packages (
+                    user_id TEXT NOT NULL,
+                    tracking_number TEXT NOT NULL,
+                    added_at REAL NOT NULL,
+                    PRIMARY KEY (user_id, tracking_number)
+                )
+                """
+            )
+            # 狀態以單號為單位，多位使用者追蹤同一個單號時共用
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS statuses (
+                    tracking_number TEXT PRIMARY KEY,
+                    last_status TEXT,
+                    last_checked REAL
+                )
+                """
+            )
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS packages_by_number "
+                "ON packages (tracking_number)"
+            )
+
+    def import_json(self, json_path):
+        """把舊版 pack.json (使用者 -> 單號) 匯入一次，完成後改名保留備份。"""
+        if not os.path.exists(json_path):
+            return 0
+        with open(json_path, "r") as f:
+            packages = json.load(f)
+        now = time.time()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO packages (user_id, tracking_number, added_at) "
+                "VALUES (?, ?, ?)",
+                [(user_id, number, now) for user_id, number in packages.items()],
+            )
+        os.replace(json_path, f"{json_path}.migrated")
+        return len(packages)
+
+    def add(self, user_id, tracking_number):
+        """登記單號；已經登記過時回傳 False。"""
+        with self.conn:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO packages (user_id, tracking_number, added_at) "
+                "VALUES (?, ?, ?)",
+                (str(user_id), tracking_number, time.time()),
+            )
+        return cursor.rowcount == 1
+
+    def remove(self, user_id, tracking_number):
+        with self.conn:
+            cursor = self.conn.execute(
+                "DELETE FROM packages WHERE user_id = ? AND tracking_number = ?",
+                (str(user_id), tracking_number),
+            )
+            # 沒有人追蹤的單號也一併清掉狀態
+            self.conn.execute(
+                "DELETE FROM statuses WHERE tracking_number = ? AND NOT EXISTS "
+                "(SELECT 1 FROM packages WHERE tracking_number = ?)",
+                (tracking_number, tracking_number),
+            )
+        return cursor.rowcount == 1
+
+    def count(self, user_id):
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM packages WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return row[0]
+
+    def packages_for(self, user_id):
+        """回傳 [(單號, 最後狀態, 最後查詢時間), ...]，依登記順序排列。"""
+        return self.conn.execute(
+            "SELECT p.tracking_number, s.last_status, s.last_checked "
+            "FROM packages p LEFT JOIN statuses s USING (tracking_number) "
+            "WHERE p.user_id = ? ORDER BY p.added_at",
+            (str(user_id),),
+        ).fetchall()
+
+    def all_packages(self):
+        return self.conn.execute(
+            "SELECT user_id, tracking_number FROM packages"
+        ).fetchall()
+
+    def record_status(self, tracking_number, status):
+        """
+        更新單號的最後狀態與查詢時間，回傳更新前的狀態 (沒有紀錄時為 None)。
+        沒有人登記的單號 (例如 !check 臨時查詢) 不記錄。
+        """
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT last_status FROM statuses WHERE tracking_number = ?",
+                (tracking_number,),
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO statuses "
+                "(tracking_number, last_status, last_checked) "
+                "SELECT ?, ?, ? WHERE EXISTS "
+                "(SELECT 1 FROM packages WHERE tracking_number = ?)",
+                (tracking_number, status, time.time(), tracking_number),
+            )
+        return row[0] if row else None
+
+    def close(self):
+        self.conn.close()
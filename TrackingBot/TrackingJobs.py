@@ -0,0 +1,187 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 查詢階段：(代號, 進度百分比, 顯示文字)，由實際執行到的步驟回報
+STAGES = {
+    "queued": (0, "排隊中"),
+    "browser": (20, "已取得瀏覽器"),
+    "page": (40, "查詢頁面已載入"),
+    "captcha": (60, "驗證碼已辨識"),
+    "submitted": (80, "已送出查詢"),
+    "parsed": (100, "結果解析完成"),
+}
+
+
+# 代表包裹已到最終狀態的關鍵字，這類結果可以快取較久
+FINAL_KEYWORDS = ("已取件", "取件成功", "已完成", "已退回", "退貨完成")
+# 這類結果不快取，下次查詢重新爬取
+FAILED_KEYWORDS = ("查詢失敗", "查無資料")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def render_progress(stage):
+    percent, label = STAGES[stage]
+    filled = percent // 10
+    progress_bar = "█" * filled + "-" * (10 - filled)
+    return f"查詢中: `[{progress_bar}] {percent}%` {label}"
+
+
+class ResultCache:
+    """
+    依單號快取查詢結果：運送中的狀態很快會變，TTL 較短；
+    已取件 / 已退回等最終狀態幾乎不會再變，TTL 較長。查詢失敗不快取。
+    """
+
+    def __init__(self, ttl=300, final_ttl=6 * 3600, final_keywords=FINAL_KEYWORDS):
+        self.ttl = ttl
+        self.final_ttl = final_ttl
+        self.final_keywords = final_keywords
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, status):
+        if any(keyword in status for keyword in self.final_keywords):
+            return self.final_ttl
+        return self.ttl
+
+    def get(self, tracking_number):
+        with self._lock:
+            item = self._items.get(tracking_number)
+            if item is None:
+                return None
+            status, expires_at = item
+            if time.monotonic() >= expires_at:
+                del self._items[tracking_number]
+                return None
+            return status
+
+    def put(self, tracking_number, status):
+        if not status or any(keyword in status for keyword in FAILED_KEYWORDS):
+            return
+        with self._lock:
+            self._items[tracking_number] = (
+                status,
+                time.monotonic() + self.ttl_for(status),
+            )
+            # 順手清掉過期項目，避免單號越積越多
+            if len(self._items) > 1024:
+                now = time.monotonic()
+                for key in [k for k, (_, exp) in self._items.items() if exp <= now]:
+                    del self._items[key]
+
+
+class TrackingJob:
+    """
+    一筆查詢工作：背景執行緒回報的階段事件會轉送到事件迴圈。
+    同一單號的多個請求共用同一個 job，每位等待者各自用 stages() 讀取進度。
+    """
+
+    def __init__(self, tracking_number, loop):
+        self.tracking_number = tracking_number
+        self.cached = False
+        self._loop = loop
+        self._reported = 0  # 已回報的最高進度，只在工作執行緒中存取
+        self._history = []
+        self._listeners = []
+        self.future = None
+
+    def report(self, stage):
+        # 進度只前進：驗證碼重送或 HTTP 失敗改用瀏覽器時重新走過的步驟不再回報，
+        # 避免進度條從 80% 倒退回 20%
+        percent = STAGES[stage][0]
+        if percent <= self._reported:
+            return
+        self._reported = percent
+        # 在工作執行緒中呼叫，安全地交給事件迴圈
+        self._loop.call_soon_threadsafe(self._publish, stage)
+
+    def _publish(self, stage):
+        self._history.append(stage)
+        for listener in self._listeners:
+            listener.put_nowait(stage)
+
+    async def stages(self):
+        """依序產生階段事件 (包含加入前已發生的階段)，直到查詢完成。"""
+        events = asyncio.Queue()
+        for stage in self._history:
+            events.put_nowait(stage)
+        self._listeners.append(events)
+        try:
+            while True:
+                get_event = asyncio.ensure_future(events.get())
+                done, _ = await asyncio.wait(
+                    {get_event, self.future}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if get_event in done:
+                    yield get_event.result()
+                    continue
+                get_event.cancel()
+                # 查詢已完成，把還沒處理的事件送完就結束
+                while not events.empty():
+                    yield events.get_nowait()
+                return
+        finally:
+            self._listeners.remove(events)
+
+
+class TrackingJobQueue:
+    """
+    有上限的查詢佇列：最多 max_pending 筆排隊或執行中，
+    由 workers 個執行緒處理，滿了就直接拒絕讓使用者稍後再試。
+    命中快取的單號直接回傳結果；同一單號正在查詢時，新的請求併入同一個 job。
+    """
+
+    def __init__(self, lookup, workers=2, max_pending=20, cache=None):
+        self.lookup = lookup  # lookup(tracking_number, report) -> 查詢結果
+        self.max_pending = max_pending
+        self.cache = cache
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}  # 只在事件迴圈執行緒中存取
+
+    def submit(self, tracking_number):
+        loop = asyncio.get_running_loop()
+
+        if self.cache is not None:
+            status = self.cache.get(tracking_number)
+            if status is not None:
+                job = TrackingJob(tracking_number, loop)
+                job.cached = True
+                job.future = loop.create_future()
+                job.future.set_result(status)
+                return job
+
+        job = self._in_flight.get(tracking_number)
+        if job is not None:
+            return job
+
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError("目前查詢人數過多，請稍後再試。")
+            self._pending += 1
+
+        job = TrackingJob(tracking_number, loop)
+        # 交給執行緒前先記下 queued，確保它一定排在工作回報的階段之前
+        job._publish("queued")
+        job.future = loop.run_in_executor(self.executor, self._run, job)
+        self._in_flight[tracking_number] = job
+        job.future.add_done_callback(
+            lambda _: self._in_flight.pop(tracking_number, None)
+        )
+        return job
+
+    def _run(self, job):
+        try:
+            status = self.lookup(job.tracking_number, job.report)
+            if self.cache is not None:
+                self.cache.put(job.tracking_number, status)
+            return status
+        finally:
+            with self._lock:
+                self._pending -= 1